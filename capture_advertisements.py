@@ -0,0 +1,165 @@
+"""Capture RD200 advertisements and look for readings in them.
+
+capture scans with bleak and writes every advertisement of an FR:* device
+as one JSON line. diff reads such a capture, or the "advertisements" list
+from the integration's diagnostics download (with passive mode enabled),
+and prints for every payload which bytes never change and how the others
+moved, as u8 and little-endian u16 series. Compare those series with the
+sensor history over the same time to look for the offset of a reading; no
+RD200 firmware is known to advertise one yet.
+
+    python capture_advertisements.py capture --duration 3600 -o adverts.jsonl
+    python capture_advertisements.py diff adverts.jsonl
+    python capture_advertisements.py diff config_entry-rd200_ble-xxxx.json
+"""
+import argparse
+import asyncio
+import json
+import struct
+import sys
+import time
+
+# Distinct values shown per varying offset
+MAX_SERIES = 20
+
+
+async def capture(args):
+    from bleak import BleakScanner
+
+    last = {}
+    stop = time.monotonic() + args.duration
+    with open(args.output, "a", encoding="utf-8") as file:
+
+        def detected(device, advertisement):
+            name = advertisement.local_name or device.name or ""
+            if not name.startswith("FR:"):
+                return
+            if args.address and device.address.upper() != args.address.upper():
+                return
+            entry = {
+                "manufacturer_data": {
+                    str(key): value.hex()
+                    for key, value in advertisement.manufacturer_data.items()
+                },
+                "service_data": {
+                    key: value.hex() for key, value in advertisement.service_data.items()
+                },
+            }
+            # Only changed payloads, like the integration's log
+            if last.get(device.address) == entry:
+                return
+            last[device.address] = entry
+            entry.update(
+                timestamp=time.time(),
+                address=device.address,
+                name=name,
+                rssi=advertisement.rssi,
+            )
+            file.write(json.dumps(entry) + "\n")
+            file.flush()
+            print(f"{device.address} {name} {advertisement.rssi} dBm", file=sys.stderr)
+
+        async with BleakScanner(detected):
+            while time.monotonic() < stop:
+                await asyncio.sleep(1)
+
+
+def load_entries(path):
+    with open(path, encoding="utf-8") as file:
+        text = file.read()
+    try:
+        dump = json.loads(text)
+    except ValueError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    if isinstance(dump, dict):
+        if "advertisements" not in dump:
+            dump = dump["data"]
+        address = (dump.get("data") or {}).get("address")
+        dump = dump["advertisements"] or []
+        for entry in dump:
+            entry.setdefault("address", address)
+    return dump
+
+
+def group_payloads(entries):
+    """Return {(address, payload key): [(timestamp, bytes)]}."""
+    payloads = {}
+    for entry in entries:
+        for source in ("manufacturer_data", "service_data"):
+            for key, value in entry.get(source, {}).items():
+                payloads.setdefault(
+                    (entry.get("address"), f"{source}[{key}]"), []
+                ).append((entry.get("timestamp"), bytes.fromhex(value)))
+    return payloads
+
+
+def series(values):
+    """Distinct values in order, consecutive repeats dropped."""
+    result = []
+    for value in values:
+        if not result or result[-1] != value:
+            result.append(value)
+    return result
+
+
+def describe(samples):
+    lines = []
+    lengths = sorted({len(payload) for _, payload in samples})
+    lines.append(f"  {len(samples)} payloads, length {lengths}")
+    length = lengths[0]
+    first = samples[0][1]
+    constant = [
+        offset
+        for offset in range(length)
+        if all(payload[offset] == first[offset] for _, payload in samples)
+    ]
+    varying = [offset for offset in range(length) if offset not in constant]
+    lines.append(
+        "  constant: "
+        + (" ".join(f"{offset}={first[offset]:02x}" for offset in constant) or "-")
+    )
+    if not varying:
+        lines.append("  no byte changes in this capture")
+    for offset in varying:
+        u8 = series(payload[offset] for _, payload in samples)
+        lines.append(f"  [{offset}] u8    {u8[:MAX_SERIES]}")
+        if offset + 2 <= length:
+            u16 = series(
+                struct.unpack_from("<H", payload, offset)[0] for _, payload in samples
+            )
+            lines.append(f"  [{offset}] u16le {u16[:MAX_SERIES]}")
+    return lines
+
+
+def diff(args):
+    payloads = group_payloads(load_entries(args.input))
+    if not payloads:
+        print("No advertisement payloads found")
+        return 1
+    for (address, key), samples in sorted(
+        payloads.items(), key=lambda item: (str(item[0][0]), item[0][1])
+    ):
+        print(f"{address} {key}")
+        print("\n".join(describe(samples)))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    capture_parser = commands.add_parser("capture", help="scan and record advertisements")
+    capture_parser.add_argument("--duration", type=float, default=600, help="seconds")
+    capture_parser.add_argument("--address", help="only this device")
+    capture_parser.add_argument("-o", "--output", default="advertisements.jsonl")
+    diff_parser = commands.add_parser("diff", help="show which bytes change")
+    diff_parser.add_argument("input", help="capture or diagnostics download")
+    args = parser.parse_args()
+
+    if args.command == "capture":
+        asyncio.run(capture(args))
+        return 0
+    return diff(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,41 +1,120 @@
 """The RD200 BLE integration."""
 from __future__ import annotations
 
+import asyncio
 import dataclasses
 from datetime import timedelta
+from functools import partial
 import logging
+import shutil
+import time
 from typing import Any
 
-from .rd200_ble import RD200BluetoothDeviceData, RD200Device
+from .rd200_ble import (
+    AdvertisementLog,
+    FrameTrace,
+    PulseEstimator,
+    RD200BluetoothDeviceData,
+    RD200Device,
+    RD200GattCache,
+    async_update_device,
+    forget_device,
+    merge_device,
+)
+from .rd200_ble.const import BQ_TO_PCI_MULTIPLIER
 
 from homeassistant.components import bluetooth
+from homeassistant.components.bluetooth import (
+    BluetoothCallbackMatcher,
+    BluetoothChange,
+    BluetoothScanningMode,
+    BluetoothServiceInfoBleak,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_CORE_CONFIG_UPDATE, Platform
+from homeassistant.core import Event, HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.dispatcher import (
+    async_dispatcher_connect,
+    async_dispatcher_send,
+)
+from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from homeassistant.helpers.storage import Store
+from homeassistant.helpers.storage import STORAGE_DIR, Store
 from homeassistant.util import dt as dt_util
 from homeassistant.util.unit_system import METRIC_SYSTEM
 from bleak_retry_connector import close_stale_connections_by_address
 
+from .aggregate import RD200Aggregate
+from .archive import RD200Archive, archive_values
+from .models import RD200Data
+from .services import async_setup_services
+from .interval import AdaptiveInterval
+from .profiler import UpdateProfiler
+from .source import RD200SourceSelector
+from .threshold import THRESHOLD_KEYS, ThresholdMonitor
 from .const import (
+    CONF_ACTION_LEVEL,
+    CONF_ADAPTIVE_INTERVAL,
+    CONF_AGGREGATE,
     CONF_KEEP_LAST_VALID_VALUE,
     CONF_MAX_CACHE_AGE_HOURS,
+    CONF_MAX_INTERVAL,
+    CONF_MIN_INTERVAL,
+    CONF_PASSIVE_MODE,
+    CONF_PULSE_ESTIMATOR,
+    CONF_THRESHOLD_HYSTERESIS,
+    CONF_THRESHOLD_MIN_DURATION,
+    CONF_THRESHOLD_PREFIX,
+    DATA_STARTUP_LIMIT,
+    DATA_FLOW_HANDOFF,
+    DEFAULT_ACTION_LEVEL,
+    DEFAULT_ADAPTIVE_INTERVAL,
     DEFAULT_KEEP_LAST_VALID_VALUE,
     DEFAULT_MAX_CACHE_AGE_HOURS,
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_PASSIVE_MODE,
+    DEFAULT_PULSE_ESTIMATOR,
     DEFAULT_SCAN_INTERVAL,
+    DEFAULT_THRESHOLD,
+    DEFAULT_THRESHOLD_HYSTERESIS,
+    DEFAULT_THRESHOLD_MIN_DURATION,
     DOMAIN,
+    EVENT_THRESHOLD,
+    MAX_CONCURRENT_STARTUP_REFRESHES,
+    SIGNAL_DEVICE_UPDATE,
+    STORE_KEY_ESTIMATOR,
+    STORE_KEY_GATT,
+    STORE_KEY_THRESHOLDS,
 )
 
 PLATFORMS: list[Platform] = [Platform.SENSOR]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
 _LOGGER = logging.getLogger(__name__)
 
 
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the RD200 BLE services."""
+    async_setup_services(hass)
+    return True
+
+
+def _archive_path(hass: HomeAssistant, address: str) -> str:
+    """Return the directory of the reading archive of a device."""
+    return hass.config.path(
+        STORAGE_DIR, f"{DOMAIN}_archive", address.replace(":", "").lower()
+    )
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up RD200 BLE device from a config entry."""
     hass.data.setdefault(DOMAIN, {})
+    if entry.data.get(CONF_AGGREGATE):
+        return await _async_setup_aggregate_entry(hass, entry)
     address = entry.unique_id
 
     elevation = hass.config.elevation
@@ -43,6 +122,56 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     assert address is not None
     store = Store[dict[str, Any]](hass, 1, f"{DOMAIN}.{entry.entry_id}")
     cached_data = await store.async_load()
+    # The resolved GATT layout is stored next to the cached readings
+    stored_gatt_cache = RD200GattCache.from_dict(
+        cached_data.pop(STORE_KEY_GATT, None) if cached_data else None
+    )
+    # So is the pulse estimator, which takes hours to calibrate
+    estimator: PulseEstimator | None = None
+    stored_estimator = cached_data.pop(STORE_KEY_ESTIMATOR, None) if cached_data else None
+    if entry.options.get(CONF_PULSE_ESTIMATOR, DEFAULT_PULSE_ESTIMATOR):
+        estimator = PulseEstimator()
+        estimator.restore(stored_estimator)
+    # Thresholds are in the units of the sensors
+    thresholds = ThresholdMonitor(
+        {
+            key: entry.options.get(f"{CONF_THRESHOLD_PREFIX}{key}", DEFAULT_THRESHOLD)
+            for key in THRESHOLD_KEYS
+        },
+        hysteresis=entry.options.get(
+            CONF_THRESHOLD_HYSTERESIS, DEFAULT_THRESHOLD_HYSTERESIS
+        ),
+        min_duration=entry.options.get(
+            CONF_THRESHOLD_MIN_DURATION, DEFAULT_THRESHOLD_MIN_DURATION
+        )
+        * 60,
+    )
+    thresholds.restore(
+        cached_data.pop(STORE_KEY_THRESHOLDS, None) if cached_data else None
+    )
+    if not cached_data:
+        cached_data = None
+
+    # One protocol session for the life of the entry, so what it learns
+    # carries over from poll to poll.
+    rd200 = RD200BluetoothDeviceData(
+        _LOGGER, elevation, is_metric, gatt_cache=stored_gatt_cache, trace=FrameTrace()
+    )
+
+    def _store_data() -> dict[str, Any]:
+        data = dict(cached_data or {})
+        if rd200.gatt_cache is not None:
+            data[STORE_KEY_GATT] = rd200.gatt_cache.as_dict()
+        if estimator is not None:
+            data[STORE_KEY_ESTIMATOR] = estimator.as_dict()
+        if thresholds.states:
+            data[STORE_KEY_THRESHOLDS] = thresholds.as_dict()
+        return data
+
+    async def _async_save() -> None:
+        nonlocal stored_gatt_cache
+        stored_gatt_cache = rd200.gatt_cache
+        await store.async_save(_store_data())
 
     def _cache_enabled() -> bool:
         return entry.options.get(
@@ -74,91 +203,385 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     def _unknown_cached_device(cached_device: RD200Device) -> RD200Device:
         return dataclasses.replace(
             cached_device,
+            stale=True,
             sensors={key: None for key in cached_device.sensors},
         )
 
-    await close_stale_connections_by_address(address)
-    
-    ble_device = bluetooth.async_ble_device_from_address(hass, address)
+    def _stale_cached_device(cached_device: RD200Device) -> RD200Device:
+        if _cache_expired():
+            return _unknown_cached_device(cached_device)
+        return dataclasses.replace(cached_device, stale=True)
 
-    if not ble_device and not (_cache_enabled() and _cached_device()):
-        raise ConfigEntryNotReady(f"Could not find RD200 device with address {address}")
+    adaptive_interval: AdaptiveInterval | None = None
+    if entry.options.get(CONF_ADAPTIVE_INTERVAL, DEFAULT_ADAPTIVE_INTERVAL):
+        adaptive_interval = AdaptiveInterval(
+            entry.options.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL),
+            entry.options.get(CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL),
+            entry.options.get(CONF_ACTION_LEVEL, DEFAULT_ACTION_LEVEL),
+        )
 
-    async def _async_update_method() -> RD200Device:
-        """Get data from RD200 BLE."""
+    source_selector = RD200SourceSelector(hass, address)
+    profiler = UpdateProfiler(hass, address)
+    entry.async_on_unload(profiler.async_stop)
+    archive = RD200Archive(_archive_path(hass, address))
+    startup_limit: asyncio.Semaphore = hass.data.setdefault(
+        DATA_STARTUP_LIMIT, asyncio.Semaphore(MAX_CONCURRENT_STARTUP_REFRESHES)
+    )
+
+    async def _async_process_update(
+        data: RD200Device, read_at: str | None = None
+    ) -> RD200Device:
+        """Merge a fresh reading into the cache and persist it.
+
+        read_at is when the reading was taken, if not just now.
+        """
         nonlocal cached_data
+
+        cached_device = _cached_device()
+        merged_device = merge_device(
+            cached_device, data, read_at or dt_util.utcnow().isoformat()
+        )
+        if merged_device is None:
+            if _cache_enabled() and cached_device is not None:
+                if _cache_expired():
+                    return _unknown_cached_device(cached_device)
+                _LOGGER.warning("Using cached data for %s after an empty update", address)
+                return dataclasses.replace(cached_device, stale=True)
+            return data
+
+        cached_data = dataclasses.asdict(merged_device)
+        profiler.mark("merge")
+        await _async_save()
+        profiler.mark("store save")
+
+        if _cache_enabled():
+            return RD200Device(**cached_data)
+        return data
+
+    # A reading taken by the config flow moments ago seeds the new entry, so
+    # it does not reconnect straight away.
+    handoff = hass.data.get(DATA_FLOW_HANDOFF, {}).pop(address, None)
+    initial_data: RD200Device | None = None
+    if handoff is not None:
+        read_at, flow_device, flow_gatt_cache = handoff
+        if flow_gatt_cache is not None:
+            rd200.gatt_cache = flow_gatt_cache
+        # A form can stay open for hours; only a recent reading is used
+        age = time.monotonic() - read_at
+        if age < DEFAULT_SCAN_INTERVAL and any(
+            value is not None for value in flow_device.sensors.values()
+        ):
+            # The flow sets the identifier from the advertisement; keep the
+            # entity unique ids the same as for entries set up without it.
+            initial_data = await _async_process_update(
+                dataclasses.replace(flow_device, identifier=""),
+                (dt_util.utcnow() - timedelta(seconds=age)).isoformat(),
+            )
+
+    snapshot = _cached_device()
+
+    if snapshot is None and initial_data is None:
+        await close_stale_connections_by_address(address)
+
         ble_device = bluetooth.async_ble_device_from_address(hass, address)
-        rd200 = RD200BluetoothDeviceData(_LOGGER, elevation, is_metric)
+
+        if not ble_device:
+            raise ConfigEntryNotReady(f"Could not find RD200 device with address {address}")
+
+    async def _async_archive(data: RD200Device) -> None:
+        """Append a live reading to the long-term archive."""
+        values = archive_values(data.sensors, rd200.is_metric)
+        if all(value is None for value in values.values()):
+            return
+        try:
+            await hass.async_add_executor_job(
+                archive.append, dt_util.utcnow().timestamp(), values
+            )
+        except OSError as err:
+            _LOGGER.warning("Unable to archive reading of %s: %s", address, err)
+
+    def _estimate(data: RD200Device) -> None:
+        """Add the pulse estimate to a live reading, in the sensor units."""
+        assert estimator is not None
+        scale = 1 if rd200.is_metric else BQ_TO_PCI_MULTIPLIER
+        radon = data.sensors.get("radon")
+        estimate = estimator.update(
+            data.sensors.get("radon_C_last"),
+            data.sensors.get("radon_C_now"),
+            None if radon is None else radon / scale,
+        )
+        data.sensors.update(
+            {
+                key: None if value is None else round(value * scale, 2)
+                for key, value in estimate.items()
+            }
+        )
+
+    def _fire_threshold_events(data: RD200Device) -> None:
+        """Fire an event for every value that crossed its threshold."""
+        for key, value, state in thresholds.evaluate(
+            data.sensors, dt_util.utcnow().timestamp()
+        ):
+            hass.bus.async_fire(
+                EVENT_THRESHOLD,
+                {
+                    "config_entry_id": entry.entry_id,
+                    "address": address,
+                    "name": entry.title,
+                    "sensor": key,
+                    "value": value,
+                    "threshold": state.threshold,
+                    "state": "above" if state.above else "below",
+                },
+            )
+
+    advertisement_log: AdvertisementLog | None = None
+    if entry.options.get(CONF_PASSIVE_MODE, DEFAULT_PASSIVE_MODE):
+        advertisement_log = AdvertisementLog()
+
+    async def _async_update_method() -> RD200Device:
+        """Get data from RD200 BLE and pick when to poll next."""
+        if profiler.remaining:
+            data = await profiler.async_profile(_async_poll)
+        else:
+            data = await _async_poll()
+        # A stale cached reading says nothing about the device; keep the pace
+        if adaptive_interval is not None and not data.stale:
+            coordinator.update_interval = timedelta(
+                seconds=adaptive_interval.update(
+                    data.sensors, dt_util.utcnow().timestamp()
+                )
+            )
+        return data
+
+    async def _async_poll() -> RD200Device:
+        """Get data from RD200 BLE."""
+        source: str | None = None
 
         try:
+            ble_device, source = source_selector.async_best_device()
             if ble_device is None:
                 raise RuntimeError("Bluetooth device is not currently available")
-            data = await rd200.update_device(ble_device)
+            rd200.last_connect_time = None
+            rd200.connect_failed = False
+            rd200.unchanged = False
+            # Every poll of the entry, scheduled or asked for, is a real
+            # session; only one already running is joined.
+            data = await async_update_device(rd200, ble_device, reuse_window=0)
+            profiler.mark("ble session")
         except Exception as err:
+            # Like successes below, only a failure to connect in a session
+            # of this entry counts against the source; a protocol or decode
+            # error after connecting does not.
+            if rd200.connect_failed:
+                source_selector.async_record(source, False, None)
             cached_device = _cached_device()
             if _cache_enabled() and cached_device is not None:
                 if _cache_expired():
                     _LOGGER.warning("Cached data for %s has expired", address)
                     return _unknown_cached_device(cached_device)
                 _LOGGER.warning("Using cached data for %s after update error: %s", address, err)
-                return cached_device
+                return dataclasses.replace(cached_device, stale=True)
             raise UpdateFailed(f"Unable to fetch data: {err}") from err
+        finally:
+            if rd200.gatt_cache != stored_gatt_cache:
+                await _async_save()
 
-        valid_sensors = {
-            key: value for key, value in data.sensors.items() if value is not None
-        }
-        if not valid_sensors:
-            cached_device = _cached_device()
-            if _cache_enabled() and cached_device is not None:
-                if _cache_expired():
-                    return _unknown_cached_device(cached_device)
-                _LOGGER.warning("Using cached data for %s after an empty update", address)
-                return cached_device
-            return data
-
-        cached_device = _cached_device()
-        merged_sensors = cached_device.sensors.copy() if cached_device else {}
-        merged_sensors.update(valid_sensors)
-        cached_data = dataclasses.asdict(
-            dataclasses.replace(
-                data,
-                name=data.name or (cached_device.name if cached_device else ""),
-                identifier=data.identifier
-                or (cached_device.identifier if cached_device else ""),
-                hw_version=data.hw_version
-                or (cached_device.hw_version if cached_device else ""),
-                sw_version=data.sw_version
-                or (cached_device.sw_version if cached_device else ""),
-                last_valid_update=dt_util.utcnow().isoformat(),
-                sensors=merged_sensors,
-            )
-        )
-        await store.async_save(cached_data)
-
-        if _cache_enabled():
-            return RD200Device(**cached_data)
-        return data
+        # Only sessions this entry connected itself say anything about the
+        # source; a shared session may have used another one.
+        if not data.shared and rd200.last_connect_time is not None:
+            source_selector.async_record(source, True, rd200.last_connect_time)
+        if data.shared and coordinator.data is not None:
+            # Another caller's session, taken in by whoever started it; archiving,
+            # estimating or saving it again would count the reading twice.
+            return coordinator.data
+        if (
+            rd200.unchanged
+            and coordinator.data is not None
+            and not coordinator.data.stale
+        ):
+            # The device has not refreshed since the last poll. The reading
+            # is not merged, archived or estimated again, and the same data
+            # is returned so no entity is written. Only the cache's age moves
+            # on, in memory until the next save; the session keeps last_seen.
+            if cached_data is not None:
+                cached_data["last_valid_update"] = dt_util.utcnow().isoformat()
+            if thresholds.states:
+                previous_states = thresholds.as_dict()
+                _fire_threshold_events(coordinator.data)
+                if thresholds.as_dict() != previous_states:
+                    # Keep a crossing found here across a restart
+                    await _async_save()
+            return coordinator.data
+        await _async_archive(data)
+        profiler.mark("archive")
+        if estimator is not None:
+            _estimate(data)
+        if thresholds.states:
+            _fire_threshold_events(data)
+        return await _async_process_update(data)
 
     coordinator = DataUpdateCoordinator(
         hass,
         _LOGGER,
         name=DOMAIN,
         update_method=_async_update_method,
-        update_interval=timedelta(seconds=DEFAULT_SCAN_INTERVAL),
+        update_interval=timedelta(
+            seconds=adaptive_interval.interval
+            if adaptive_interval is not None
+            else DEFAULT_SCAN_INTERVAL
+        ),
+        always_update=False,
+    )
+
+    if initial_data is not None:
+        coordinator.data = initial_data
+    elif snapshot is None:
+        await coordinator.async_config_entry_first_refresh()
+    else:
+        # Create the entities from the stored snapshot right away and do the
+        # first BLE session in the background, so startup does not wait for
+        # the device.
+        coordinator.data = _stale_cached_device(snapshot)
+
+        async def _async_first_refresh() -> None:
+            # Only the refreshes of a restart are queued, so the whole fleet
+            # does not connect at once; polls after that are spread by their
+            # own intervals.
+            async with startup_limit:
+                await close_stale_connections_by_address(address)
+                await coordinator.async_refresh()
+
+        entry.async_create_background_task(
+            hass, _async_first_refresh(), f"{DOMAIN} first refresh {address}"
+        )
+
+    hass.data[DOMAIN][entry.entry_id] = RD200Data(
+        coordinator=coordinator,
+        session=rd200,
+        source_selector=source_selector,
+        archive=archive,
+        estimator=estimator,
+        thresholds=thresholds,
+        profiler=profiler,
+        advertisement_log=advertisement_log,
     )
 
-    await coordinator.async_config_entry_first_refresh()
+    @callback
+    def _async_handle_advertisement(
+        service_info: BluetoothServiceInfoBleak, change: BluetoothChange
+    ) -> None:
+        """Record what the device broadcasts, for diagnostics."""
+        assert advertisement_log is not None
+        advertisement_log.append(
+            service_info.source,
+            service_info.rssi,
+            service_info.manufacturer_data,
+            service_info.service_data,
+        )
 
-    hass.data[DOMAIN][entry.entry_id] = coordinator
+    if advertisement_log is not None:
+        entry.async_on_unload(
+            bluetooth.async_register_callback(
+                hass,
+                _async_handle_advertisement,
+                BluetoothCallbackMatcher(address=address, connectable=False),
+                BluetoothScanningMode.PASSIVE,
+            )
+        )
+
+    @callback
+    def _async_dispatch_update() -> None:
+        """Pass the latest reading on to the aggregate entry."""
+        async_dispatcher_send(
+            hass,
+            SIGNAL_DEVICE_UPDATE,
+            entry.entry_id,
+            entry.title,
+            coordinator.data if coordinator.last_update_success else None,
+        )
+
+    entry.async_on_unload(coordinator.async_add_listener(_async_dispatch_update))
+    _async_dispatch_update()
+
+    async def _async_core_config_updated(event: Event) -> None:
+        """Follow elevation and unit system changes."""
+        rd200.reconfigure(elevation=hass.config.elevation)
+        if (hass.config.units is METRIC_SYSTEM) != rd200.is_metric:
+            # Entity units are fixed when the sensors are created
+            hass.async_create_task(hass.config_entries.async_reload(entry.entry_id))
+
+    entry.async_on_unload(
+        hass.bus.async_listen(EVENT_CORE_CONFIG_UPDATE, _async_core_config_updated)
+    )
+
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     return True
 
 
+async def _async_setup_aggregate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up the building-wide aggregate over all RD200 entries."""
+    aggregate = RD200Aggregate()
+    for entry_id, data in hass.data[DOMAIN].items():
+        if not isinstance(data, RD200Data):
+            continue
+        device_entry = hass.config_entries.async_get_entry(entry_id)
+        aggregate.async_update_device(
+            entry_id,
+            device_entry.title if device_entry else entry_id,
+            data.coordinator.data if data.coordinator.last_update_success else None,
+        )
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_DEVICE_UPDATE, aggregate.async_update_device
+        )
+    )
+    hass.data[DOMAIN][entry.entry_id] = aggregate
+
+    is_metric = hass.config.units is METRIC_SYSTEM
+
+    async def _async_core_config_updated(event: Event) -> None:
+        """Follow unit system changes like the device entries do."""
+        if (hass.config.units is METRIC_SYSTEM) != is_metric:
+            hass.async_create_task(hass.config_entries.async_reload(entry.entry_id))
+
+    entry.async_on_unload(
+        hass.bus.async_listen(EVENT_CORE_CONFIG_UPDATE, _async_core_config_updated)
+    )
+
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    return True
+
+
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         hass.data[DOMAIN].pop(entry.entry_id)
+        if not entry.data.get(CONF_AGGREGATE):
+            forget_device(entry.unique_id)
+            async_dispatcher_send(
+                hass, SIGNAL_DEVICE_UPDATE, entry.entry_id, entry.title, None
+            )
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the stored data and the reading archive of a removed device."""
+    if entry.data.get(CONF_AGGREGATE) or entry.unique_id is None:
+        return
+    await Store[dict[str, Any]](hass, 1, f"{DOMAIN}.{entry.entry_id}").async_remove()
+    await hass.async_add_executor_job(
+        partial(
+            shutil.rmtree, _archive_path(hass, entry.unique_id), ignore_errors=True
+        )
+    )
@@ -0,0 +1,125 @@
+"""Building-wide radon aggregate over all RD200 entries."""
+from __future__ import annotations
+
+from collections.abc import Callable
+import heapq
+import itertools
+
+from homeassistant.core import CALLBACK_TYPE, callback
+
+from .rd200_ble import RD200Device
+
+# Rebuild the max heap once it holds this many times more entries than
+# there are devices; superseded entries are otherwise only dropped from the top
+HEAP_COMPACT_FACTOR = 4
+
+
+class RD200Aggregate:
+    """Max, mean and worst room of one value across all RD200 devices.
+
+    Every device update costs O(1) for the sum and count and O(log n)
+    amortized for the max, which is a heap of (value, device) entries where
+    a superseded entry is skipped once it reaches the top. Devices whose
+    reading is stale, failed or unloaded leave the aggregate until they
+    report a fresh value again.
+    """
+
+    def __init__(self, key: str = "radon") -> None:
+        """Initialize the aggregate of the sensor key."""
+        self.key = key
+        # entry_id -> (value, title, sequence number of its heap entry)
+        self._values: dict[str, tuple[float, str, int]] = {}
+        self._total = 0.0
+        self._heap: list[tuple[float, int, str]] = []
+        self._sequence = itertools.count()
+        self._listeners: list[CALLBACK_TYPE] = []
+
+    @property
+    def count(self) -> int:
+        """Return the number of devices with a fresh value."""
+        return len(self._values)
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean over the devices, or None without any."""
+        if not self._values:
+            return None
+        return round(self._total / len(self._values), 2)
+
+    def _top(self) -> tuple[float, str] | None:
+        """Return (value, entry_id) of the highest current value."""
+        while self._heap:
+            negated, sequence, entry_id = self._heap[0]
+            current = self._values.get(entry_id)
+            if current is not None and current[2] == sequence:
+                return -negated, entry_id
+            heapq.heappop(self._heap)
+        return None
+
+    @property
+    def max(self) -> float | None:
+        """Return the highest value, or None without any device."""
+        top = self._top()
+        return None if top is None else top[0]
+
+    @property
+    def worst(self) -> str | None:
+        """Return the title of the device with the highest value."""
+        top = self._top()
+        return None if top is None else self._values[top[1]][1]
+
+    @callback
+    def async_update_device(
+        self, entry_id: str, title: str, device: RD200Device | None
+    ) -> None:
+        """Take the latest reading of a device; None when it went away."""
+        value = None
+        if device is not None and not device.stale:
+            value = device.sensors.get(self.key)
+
+        previous = self._values.get(entry_id)
+        if previous is not None and previous[:2] == (value, title):
+            return
+        if previous is not None:
+            del self._values[entry_id]
+            self._total -= previous[0]
+        if value is not None:
+            sequence = next(self._sequence)
+            self._values[entry_id] = (value, title, sequence)
+            self._total += value
+            heapq.heappush(self._heap, (-value, sequence, entry_id))
+        if not self._values:
+            self._total = 0.0
+            self._heap.clear()
+        elif len(self._heap) > HEAP_COMPACT_FACTOR * len(self._values):
+            self._heap = [
+                (-value, sequence, entry_id)
+                for entry_id, (value, _, sequence) in self._values.items()
+            ]
+            heapq.heapify(self._heap)
+
+        if previous is None and value is None:
+            return
+        for listener in list(self._listeners):
+            listener()
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> Callable[[], None]:
+        """Call update_callback whenever the aggregate changes."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    def as_dict(self) -> dict[str, float | str | int | None]:
+        """Return the aggregate for diagnostics."""
+        return {
+            "key": self.key,
+            "count": self.count,
+            "mean": self.mean,
+            "max": self.max,
+            "worst": self.worst,
+        }
@@ -0,0 +1,234 @@
+"""Append-only columnar archive of RD200 readings."""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator
+import csv
+from datetime import UTC, datetime
+import logging
+import math
+import mmap
+import os
+import struct
+from typing import Any
+
+from .rd200_ble.const import BQ_TO_PCI_MULTIPLIER
+
+_LOGGER = logging.getLogger(__name__)
+
+# Column name and struct format; one file per column, one fixed-width value
+# per reading, in the host's byte order. Missing values are stored as NaN.
+TIMESTAMP_COLUMN = ("timestamp", "d")
+VALUE_COLUMNS = (
+    ("radon", "f"),
+    ("radon_1day_level", "f"),
+    ("radon_1month_level", "f"),
+    ("radon_C_now", "f"),
+    ("radon_C_last", "f"),
+)
+COLUMNS = (TIMESTAMP_COLUMN, *VALUE_COLUMNS)
+
+# Columns holding a concentration; stored in Bq/m³ whatever the unit system
+CONCENTRATION_COLUMNS = ("radon", "radon_1day_level", "radon_1month_level")
+
+# Rows written to a CSV export at a time
+EXPORT_CHUNK = 4096
+
+
+def archive_values(sensors: dict[str, Any], is_metric: bool) -> dict[str, float | None]:
+    """Return the archived columns of a reading, converted to Bq/m³."""
+    values: dict[str, float | None] = {}
+    for name, _ in VALUE_COLUMNS:
+        value = sensors.get(name)
+        if value is not None and not is_metric and name in CONCENTRATION_COLUMNS:
+            value = value / BQ_TO_PCI_MULTIPLIER
+        values[name] = value
+    return values
+
+
+class RD200Archive:
+    """Readings of one device, appended from the coordinator and read by mmap.
+
+    All methods do file I/O and must run in the executor.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize the archive in the directory path."""
+        self.path = path
+        self._repaired = False
+
+    def _column_path(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.col")
+
+    def _repair(self) -> None:
+        """Cut all columns to the same number of rows after a partial write."""
+        os.makedirs(self.path, exist_ok=True)
+        rows = min(
+            (
+                os.path.getsize(path) // struct.calcsize(fmt)
+                if os.path.exists(path := self._column_path(name))
+                else 0
+            )
+            for name, fmt in COLUMNS
+        )
+        for name, fmt in COLUMNS:
+            path = self._column_path(name)
+            if os.path.exists(path) and os.path.getsize(path) != rows * struct.calcsize(fmt):
+                _LOGGER.warning("Truncating %s to %s rows", path, rows)
+                os.truncate(path, rows * struct.calcsize(fmt))
+        self._repaired = True
+
+    def append(self, timestamp: float, values: dict[str, float | None]) -> None:
+        """Append one reading; timestamp is a UNIX timestamp."""
+        if not self._repaired:
+            self._repair()
+        if timestamp < self.last_timestamp():
+            _LOGGER.debug("Not archiving out of order reading at %s", timestamp)
+            return
+        # The timestamp goes last: a query running meanwhile only sees the
+        # row once all its values are there.
+        for name, fmt in (*VALUE_COLUMNS, TIMESTAMP_COLUMN):
+            value = timestamp if name == TIMESTAMP_COLUMN[0] else values.get(name)
+            with open(self._column_path(name), "ab") as file:
+                file.write(struct.pack(f"={fmt}", math.nan if value is None else value))
+
+    def last_timestamp(self) -> float:
+        """Return the timestamp of the newest reading, or -inf."""
+        path = self._column_path(TIMESTAMP_COLUMN[0])
+        size = struct.calcsize(TIMESTAMP_COLUMN[1])
+        if not os.path.exists(path) or os.path.getsize(path) < size:
+            return -math.inf
+        with open(path, "rb") as file:
+            file.seek(-size, os.SEEK_END)
+            return struct.unpack(f"={TIMESTAMP_COLUMN[1]}", file.read(size))[0]
+
+    def _open_columns(
+        self,
+    ) -> tuple[dict[str, tuple[mmap.mmap, memoryview]], int] | None:
+        """Map all columns read-only; None while the archive is empty.
+
+        Also returns the number of rows all columns hold, which bounds every
+        lookup should one be a row ahead of the others.
+        """
+        if not self._repaired:
+            self._repair()
+        columns: dict[str, tuple[mmap.mmap, memoryview]] = {}
+        for name, fmt in COLUMNS:
+            path = self._column_path(name)
+            if not os.path.exists(path) or os.path.getsize(path) == 0:
+                for mapped, view in columns.values():
+                    view.release()
+                    mapped.close()
+                return None
+            with open(path, "rb") as file:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            columns[name] = (mapped, memoryview(mapped).cast(fmt))
+        return columns, min(len(view) for _, view in columns.values())
+
+    @staticmethod
+    def _close_columns(columns: dict[str, tuple[mmap.mmap, memoryview]]) -> None:
+        for mapped, view in columns.values():
+            view.release()
+            mapped.close()
+
+    def _iter_rows(
+        self, start: float, end: float
+    ) -> Iterator[tuple[float, ...]]:
+        """Yield (timestamp, *values) for start <= timestamp <= end."""
+        if (opened := self._open_columns()) is None:
+            return
+        columns, rows = opened
+        try:
+            timestamps = columns[TIMESTAMP_COLUMN[0]][1]
+            views = [columns[name][1] for name, _ in VALUE_COLUMNS]
+            first = bisect_left(timestamps, start, 0, rows)
+            last = bisect_right(timestamps, end, first, rows)
+            for row in range(first, last):
+                yield (timestamps[row], *(view[row] for view in views))
+        finally:
+            self._close_columns(columns)
+
+    def query(
+        self, start: float, end: float, max_points: int
+    ) -> list[dict[str, float | None]]:
+        """Return readings between start and end, averaged down to max_points.
+
+        Each point is the mean of the readings in an equal slice of time;
+        missing values are left out of the mean.
+        """
+        if (opened := self._open_columns()) is None:
+            return []
+        columns, rows = opened
+        try:
+            timestamps = columns[TIMESTAMP_COLUMN[0]][1]
+            first = bisect_left(timestamps, start, 0, rows)
+            last = bisect_right(timestamps, end, first, rows)
+            if first >= last:
+                return []
+            names = [name for name, _ in VALUE_COLUMNS]
+            views = [columns[name][1] for name in names]
+
+            if last - first <= max_points:
+                return [
+                    {
+                        "timestamp": timestamps[row],
+                        **{
+                            name: None if math.isnan(value := view[row]) else round(value, 2)
+                            for name, view in zip(names, views)
+                        },
+                    }
+                    for row in range(first, last)
+                ]
+
+            # Bucket edges are found by bisecting the sorted timestamps, so
+            # each bucket is a contiguous slice that is summed in C.
+            span_start = timestamps[first]
+            width = (timestamps[last - 1] - span_start) / max_points or 1.0
+            edges = [first]
+            for bucket in range(1, max_points):
+                edges.append(
+                    bisect_left(timestamps, span_start + bucket * width, edges[-1], last)
+                )
+            edges.append(last)
+
+            points: list[dict[str, float | None]] = []
+            for low, high in zip(edges, edges[1:]):
+                if low == high:
+                    continue
+                point: dict[str, float | None] = {
+                    "timestamp": math.fsum(timestamps[low:high].tolist()) / (high - low)
+                }
+                for name, view in zip(names, views):
+                    values = [value for value in view[low:high].tolist() if value == value]
+                    point[name] = (
+                        round(math.fsum(values) / len(values), 2) if values else None
+                    )
+                points.append(point)
+            return points
+        finally:
+            self._close_columns(columns)
+
+    def export_csv(self, start: float, end: float, path: str) -> int:
+        """Stream all readings between start and end into a CSV file.
+
+        Returns the number of rows written.
+        """
+        rows = 0
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(["time", *(name for name, _ in VALUE_COLUMNS)])
+            chunk: list[list[str | float]] = []
+            for timestamp, *values in self._iter_rows(start, end):
+                chunk.append(
+                    [
+                        datetime.fromtimestamp(timestamp, UTC).isoformat(),
+                        *("" if math.isnan(value) else round(value, 2) for value in values),
+                    ]
+                )
+                if len(chunk) >= EXPORT_CHUNK:
+                    writer.writerows(chunk)
+                    rows += len(chunk)
+                    chunk.clear()
+            writer.writerows(chunk)
+            rows += len(chunk)
+        return rows
@@ -4,9 +4,15 @@ from __future__ import annotations
 
 import dataclasses
 import logging
+import time
 from typing import Any
 
-from .rd200_ble import RD200BluetoothDeviceData, RD200Device
+from .rd200_ble import (
+    RD200BluetoothDeviceData,
+    RD200Device,
+    RD200GattCache,
+    async_update_device,
+)
 from bleak import BleakError
 import voluptuous as vol
 
@@ -15,18 +21,41 @@ from homeassistant.components.bluetooth import (
     BluetoothServiceInfo,
     async_discovered_service_info,
 )
-from homeassistant.config_entries import ConfigFlow, OptionsFlow
-from homeassistant.const import CONF_ADDRESS
+from homeassistant.config_entries import ConfigEntry, ConfigFlow, OptionsFlow
+from homeassistant.const import CONF_ADDRESS, CONF_NAME
 from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.util.unit_system import METRIC_SYSTEM
 
 from .const import (
+    AGGREGATE_UNIQUE_ID,
+    CONF_ACTION_LEVEL,
+    CONF_ADAPTIVE_INTERVAL,
+    CONF_AGGREGATE,
     CONF_KEEP_LAST_VALID_VALUE,
     CONF_MAX_CACHE_AGE_HOURS,
+    CONF_MAX_INTERVAL,
+    CONF_MIN_INTERVAL,
+    CONF_PASSIVE_MODE,
+    CONF_PULSE_ESTIMATOR,
+    CONF_THRESHOLD_HYSTERESIS,
+    CONF_THRESHOLD_MIN_DURATION,
+    CONF_THRESHOLD_PREFIX,
+    DATA_FLOW_HANDOFF,
+    DEFAULT_ACTION_LEVEL,
+    DEFAULT_ADAPTIVE_INTERVAL,
     DEFAULT_KEEP_LAST_VALID_VALUE,
     DEFAULT_MAX_CACHE_AGE_HOURS,
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_PASSIVE_MODE,
+    DEFAULT_PULSE_ESTIMATOR,
+    DEFAULT_THRESHOLD,
+    DEFAULT_THRESHOLD_HYSTERESIS,
+    DEFAULT_THRESHOLD_MIN_DURATION,
     DOMAIN,
 )
+from .threshold import THRESHOLD_KEYS
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -38,6 +67,9 @@ class Discovery:
     name: str
     discovery_info: BluetoothServiceInfo
     device: RD200Device
+    gatt_cache: RD200GattCache | None = None
+    # time.monotonic() when the reading was taken
+    read_at: float = 0.0
 
 
 def get_name(device: RD200Device) -> str:
@@ -57,10 +89,16 @@ class RD200ConfigFlow(ConfigFlow, domain=DOMAIN):
 
     @staticmethod
     @callback
-    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> OptionsFlow:
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
         """Create the options flow."""
         return RD200OptionsFlow()
 
+    @classmethod
+    @callback
+    def async_supports_options_flow(cls, config_entry: ConfigEntry) -> bool:
+        """Return if the entry has options; the aggregate has none."""
+        return not config_entry.data.get(CONF_AGGREGATE)
+
     def __init__(self) -> None:
         """Initialize the config flow."""
         self._discovered_device: Discovery | None = None
@@ -68,7 +106,7 @@ class RD200ConfigFlow(ConfigFlow, domain=DOMAIN):
 
     async def _get_device_data(
         self, discovery_info: BluetoothServiceInfo
-    ) -> RD200Device:
+    ) -> tuple[RD200Device, RD200GattCache | None, float]:
         ble_device = bluetooth.async_ble_device_from_address(
             self.hass, discovery_info.address
         )
@@ -76,10 +114,16 @@ class RD200ConfigFlow(ConfigFlow, domain=DOMAIN):
             _LOGGER.debug("no ble_device in _get_device_data")
             raise RD200DeviceUpdateError("No ble_device")
 
-        rd200 = RD200BluetoothDeviceData(_LOGGER)
+        # Use the same units as the entry so a concurrent update of this
+        # address can share the session.
+        rd200 = RD200BluetoothDeviceData(
+            _LOGGER,
+            self.hass.config.elevation,
+            self.hass.config.units is METRIC_SYSTEM,
+        )
 
         try:
-            data = await rd200.update_device(ble_device)
+            data = await async_update_device(rd200, ble_device)
             data.name = discovery_info.advertisement.local_name
             data.address = discovery_info.address
             data.identifier = discovery_info.advertisement.local_name
@@ -95,7 +139,14 @@ class RD200ConfigFlow(ConfigFlow, domain=DOMAIN):
                 "Unknown error occurred from %s: %s", discovery_info.address, err
             )
             raise err
-        return data
+        return data, rd200.gatt_cache, time.monotonic()
+
+    @callback
+    def _async_hand_off(self, discovery: Discovery) -> None:
+        """Pass the flow's reading to the entry about to be created."""
+        self.hass.data.setdefault(DATA_FLOW_HANDOFF, {})[
+            discovery.discovery_info.address
+        ] = (discovery.read_at, discovery.device, discovery.gatt_cache)
 
     async def async_step_bluetooth(
         self, discovery_info: BluetoothServiceInfo
@@ -106,7 +157,7 @@ class RD200ConfigFlow(ConfigFlow, domain=DOMAIN):
         self._abort_if_unique_id_configured()
 
         try:
-            device = await self._get_device_data(discovery_info)
+            device, gatt_cache, read_at = await self._get_device_data(discovery_info)
         except RD200DeviceUpdateError:
             return self.async_abort(reason="cannot_connect")
         except Exception:  # pylint: disable=broad-except
@@ -114,7 +165,9 @@ class RD200ConfigFlow(ConfigFlow, domain=DOMAIN):
 
         name = get_name(device)
         self.context["title_placeholders"] = {"name": name}
-        self._discovered_device = Discovery(name, discovery_info, device)
+        self._discovered_device = Discovery(
+            name, discovery_info, device, gatt_cache, read_at
+        )
 
         return await self.async_step_bluetooth_confirm()
 
@@ -123,6 +176,8 @@ class RD200ConfigFlow(ConfigFlow, domain=DOMAIN):
     ) -> FlowResult:
         """Confirm discovery."""
         if user_input is not None:
+            assert self._discovered_device is not None
+            self._async_hand_off(self._discovered_device)
             return self.async_create_entry(
                 title=self.context["title_placeholders"]["name"], data={}
             )
@@ -135,6 +190,37 @@ class RD200ConfigFlow(ConfigFlow, domain=DOMAIN):
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Offer the building aggregate once there are devices to combine."""
+        if AGGREGATE_UNIQUE_ID not in self._async_current_ids() and any(
+            not entry.data.get(CONF_AGGREGATE)
+            for entry in self._async_current_entries()
+        ):
+            return self.async_show_menu(
+                step_id="user", menu_options=["device", "aggregate"]
+            )
+        return await self.async_step_device()
+
+    async def async_step_aggregate(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Create the building-wide aggregate entry."""
+        await self.async_set_unique_id(AGGREGATE_UNIQUE_ID)
+        self._abort_if_unique_id_configured()
+        if user_input is not None:
+            return self.async_create_entry(
+                title=user_input[CONF_NAME], data={CONF_AGGREGATE: True}
+            )
+
+        return self.async_show_form(
+            step_id="aggregate",
+            data_schema=vol.Schema(
+                {vol.Required(CONF_NAME, default="RD200 Building"): str}
+            ),
+        )
+
+    async def async_step_device(
+        self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Handle the user step to pick discovered device."""
         if user_input is not None:
@@ -148,6 +234,7 @@ class RD200ConfigFlow(ConfigFlow, domain=DOMAIN):
             }
 
             self._discovered_device = discovery
+            self._async_hand_off(discovery)
 
             return self.async_create_entry(title=discovery.name, data={})
 
@@ -189,13 +276,17 @@ class RD200ConfigFlow(ConfigFlow, domain=DOMAIN):
                 "RD2000 advertisement: %s", discovery_info.advertisement.local_name
             )
             try:
-                device = await self._get_device_data(discovery_info)
+                device, gatt_cache, read_at = await self._get_device_data(
+                    discovery_info
+                )
             except RD200DeviceUpdateError:
                 return self.async_abort(reason="cannot_connect")
             except Exception:  # pylint: disable=broad-except
                 return self.async_abort(reason="unknown")
             name = get_name(device)
-            self._discovered_devices[address] = Discovery(name, discovery_info, device)
+            self._discovered_devices[address] = Discovery(
+                name, discovery_info, device, gatt_cache, read_at
+            )
 
         if not self._discovered_devices:
             return self.async_abort(reason="no_devices_found")
@@ -205,7 +296,7 @@ class RD200ConfigFlow(ConfigFlow, domain=DOMAIN):
             for (address, discovery) in self._discovered_devices.items()
         }
         return self.async_show_form(
-            step_id="user",
+            step_id="device",
             data_schema=vol.Schema(
                 {
                     vol.Required(CONF_ADDRESS): vol.In(titles),
@@ -220,9 +311,15 @@ class RD200OptionsFlow(OptionsFlow):
     async def async_step_init(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
-        """Manage cached-value options."""
+        """Manage cached-value, estimator, threshold and polling options."""
+        errors: dict[str, str] = {}
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            if user_input[CONF_MIN_INTERVAL] > user_input[CONF_MAX_INTERVAL]:
+                errors["base"] = "interval_bounds"
+            else:
+                return self.async_create_entry(title="", data=user_input)
+
+        options = {**self.config_entry.options, **(user_input or {})}
 
         return self.async_show_form(
             step_id="init",
@@ -230,18 +327,70 @@ class RD200OptionsFlow(OptionsFlow):
                 {
                     vol.Optional(
                         CONF_KEEP_LAST_VALID_VALUE,
-                        default=self.config_entry.options.get(
+                        default=options.get(
                             CONF_KEEP_LAST_VALID_VALUE,
                             DEFAULT_KEEP_LAST_VALID_VALUE,
                         ),
                     ): bool,
                     vol.Optional(
                         CONF_MAX_CACHE_AGE_HOURS,
-                        default=self.config_entry.options.get(
+                        default=options.get(
                             CONF_MAX_CACHE_AGE_HOURS,
                             DEFAULT_MAX_CACHE_AGE_HOURS,
                         ),
                     ): vol.All(vol.Coerce(int), vol.Range(min=0, max=8760)),
+                    vol.Optional(
+                        CONF_PULSE_ESTIMATOR,
+                        default=options.get(
+                            CONF_PULSE_ESTIMATOR,
+                            DEFAULT_PULSE_ESTIMATOR,
+                        ),
+                    ): bool,
+                    **{
+                        vol.Optional(
+                            f"{CONF_THRESHOLD_PREFIX}{key}",
+                            default=options.get(
+                                f"{CONF_THRESHOLD_PREFIX}{key}", DEFAULT_THRESHOLD
+                            ),
+                        ): vol.All(vol.Coerce(float), vol.Range(min=0))
+                        for key in THRESHOLD_KEYS
+                    },
+                    vol.Optional(
+                        CONF_THRESHOLD_HYSTERESIS,
+                        default=options.get(
+                            CONF_THRESHOLD_HYSTERESIS, DEFAULT_THRESHOLD_HYSTERESIS
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_THRESHOLD_MIN_DURATION,
+                        default=options.get(
+                            CONF_THRESHOLD_MIN_DURATION,
+                            DEFAULT_THRESHOLD_MIN_DURATION,
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=1440)),
+                    vol.Optional(
+                        CONF_ADAPTIVE_INTERVAL,
+                        default=options.get(
+                            CONF_ADAPTIVE_INTERVAL, DEFAULT_ADAPTIVE_INTERVAL
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_MIN_INTERVAL,
+                        default=options.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=30, max=86400)),
+                    vol.Optional(
+                        CONF_MAX_INTERVAL,
+                        default=options.get(CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=30, max=86400)),
+                    vol.Optional(
+                        CONF_ACTION_LEVEL,
+                        default=options.get(CONF_ACTION_LEVEL, DEFAULT_ACTION_LEVEL),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_PASSIVE_MODE,
+                        default=options.get(CONF_PASSIVE_MODE, DEFAULT_PASSIVE_MODE),
+                    ): bool,
                 }
             ),
+            errors=errors,
         )
@@ -7,9 +7,60 @@ VOLUME_PICOCURIE = "pCi/L"
 COUNT_PULSES = "Pulses"
 
 DEFAULT_SCAN_INTERVAL = 600
+# Adaptive polling: relative radon change between readings that counts as
+# moving, and hours of stable readings before backing off past the default
+ADAPTIVE_RADON_CHANGE = 0.1
+ADAPTIVE_STABLE_HOURS = 2
+
+# Background first refreshes after a restart running at the same time
+# across all RD200 entries
+MAX_CONCURRENT_STARTUP_REFRESHES = 2
+DATA_STARTUP_LIMIT = f"{DOMAIN}_startup_limit"
+# Bluetooth source selection: assumed connect time of a source that has not
+# connected yet
+# and the weight of the newest sample in the connect time average
+SOURCE_DEFAULT_CONNECT_TIME = 5.0
+SOURCE_CONNECT_TIME_SMOOTHING = 0.3
+
+# Readings taken by the config flow, by address, for the new entry
+DATA_FLOW_HANDOFF = f"{DOMAIN}_flow_handoff"
+
+# Building-wide aggregate entry; it has no device of its own
+CONF_AGGREGATE = "aggregate"
+AGGREGATE_UNIQUE_ID = "aggregate"
+# Sent with (entry_id, title, RD200Device | None) on every device update
+SIGNAL_DEVICE_UPDATE = f"{DOMAIN}_device_update"
 
 CONF_KEEP_LAST_VALID_VALUE = "keep_last_valid_value"
 CONF_MAX_CACHE_AGE_HOURS = "max_cache_age_hours"
+CONF_PULSE_ESTIMATOR = "pulse_estimator"
+CONF_ADAPTIVE_INTERVAL = "adaptive_interval"
+CONF_PASSIVE_MODE = "passive_mode"
+# Seconds
+CONF_MIN_INTERVAL = "min_interval"
+CONF_MAX_INTERVAL = "max_interval"
+# Sensor units; 0 = none
+CONF_ACTION_LEVEL = "action_level"
+CONF_THRESHOLD_HYSTERESIS = "threshold_hysteresis"
+# Minutes a value must stay across a threshold before the event fires
+CONF_THRESHOLD_MIN_DURATION = "threshold_min_duration"
+# Followed by the sensor key, e.g. threshold_radon
+CONF_THRESHOLD_PREFIX = "threshold_"
 
 DEFAULT_KEEP_LAST_VALID_VALUE = False
 DEFAULT_MAX_CACHE_AGE_HOURS = 0
+DEFAULT_PULSE_ESTIMATOR = False
+DEFAULT_ADAPTIVE_INTERVAL = False
+DEFAULT_PASSIVE_MODE = False
+DEFAULT_MIN_INTERVAL = 120
+DEFAULT_MAX_INTERVAL = 3600
+DEFAULT_ACTION_LEVEL = 0
+DEFAULT_THRESHOLD = 0
+DEFAULT_THRESHOLD_HYSTERESIS = 0
+DEFAULT_THRESHOLD_MIN_DURATION = 0
+
+EVENT_THRESHOLD = f"{DOMAIN}_threshold"
+
+STORE_KEY_GATT = "gatt"
+STORE_KEY_ESTIMATOR = "estimator"
+STORE_KEY_THRESHOLDS = "thresholds"
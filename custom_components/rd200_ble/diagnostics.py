@@ -0,0 +1,47 @@
+"""Diagnostics support for RD200 BLE."""
+from __future__ import annotations
+
+import dataclasses
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .aggregate import RD200Aggregate
+from .const import CONF_AGGREGATE, DOMAIN
+from .models import RD200Data
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    if entry.data.get(CONF_AGGREGATE):
+        aggregate: RD200Aggregate = hass.data[DOMAIN][entry.entry_id]
+        return {"aggregate": aggregate.as_dict()}
+
+    data: RD200Data = hass.data[DOMAIN][entry.entry_id]
+    coordinator = data.coordinator
+    session = data.session
+
+    return {
+        "options": dict(entry.options),
+        "last_update_success": coordinator.last_update_success,
+        "data": dataclasses.asdict(coordinator.data) if coordinator.data else None,
+        "sources": {
+            source: dataclasses.asdict(stats)
+            for source, stats in data.source_selector.stats.items()
+        },
+        "last_seen": session.last_seen,
+        "gatt": session.gatt_cache.as_dict() if session.gatt_cache else None,
+        "reply_times": {
+            f"{opcode:#04x}": reply_time
+            for opcode, reply_time in session.reply_times.items()
+        },
+        "estimator": data.estimator.as_dict() if data.estimator else None,
+        "thresholds": data.thresholds.as_dict(),
+        "advertisements": (
+            data.advertisement_log.as_list() if data.advertisement_log else None
+        ),
+        "trace": session.trace.as_list() if session.trace else [],
+    }
@@ -0,0 +1,89 @@
+"""Poll interval that follows how fast an RD200's readings move."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+import math
+from typing import Any
+
+from .const import (
+    ADAPTIVE_RADON_CHANGE,
+    ADAPTIVE_STABLE_HOURS,
+    DEFAULT_SCAN_INTERVAL,
+)
+
+
+class AdaptiveInterval:
+    """Pick the next poll interval from the latest reading.
+
+    The interval drops to the minimum while the radon value is at or above
+    the action level, while it changes by more than ADAPTIVE_RADON_CHANGE
+    between readings, or while the pulse counts move by more than Poisson
+    noise would explain. Afterwards it doubles on every poll back up to the
+    normal scan interval, and once the readings have been stable for
+    ADAPTIVE_STABLE_HOURS it keeps doubling up to the maximum.
+    """
+
+    def __init__(
+        self, minimum: float, maximum: float, action_level: float = 0
+    ) -> None:
+        """Initialize with bounds in seconds and an action level in sensor units."""
+        self.minimum = minimum
+        self.maximum = maximum
+        self.action_level = action_level
+        self.base = min(max(DEFAULT_SCAN_INTERVAL, minimum), maximum)
+        self.interval = self.base
+        self._previous: Mapping[str, Any] | None = None
+        self._stable_since: float | None = None
+
+    @staticmethod
+    def _beyond_noise(count: int | None, expected: int | None) -> bool:
+        """Return if a pulse count is more than 3 sigma from the expected one."""
+        if count is None or expected is None:
+            return False
+        return abs(count - expected) > 3 * math.sqrt(expected + 1)
+
+    def _moving(self, sensors: Mapping[str, Any]) -> bool:
+        radon = sensors.get("radon")
+        if self.action_level and radon is not None and radon >= self.action_level:
+            return True
+        # A cycle that has already counted well over the whole previous one
+        pulses_now = sensors.get("radon_C_now")
+        pulses_last = sensors.get("radon_C_last")
+        if (
+            pulses_now is not None
+            and pulses_last is not None
+            and pulses_now > pulses_last
+            and self._beyond_noise(pulses_now, pulses_last)
+        ):
+            return True
+        if (previous := self._previous) is None:
+            return False
+        previous_radon = previous.get("radon")
+        if (
+            radon is not None
+            and previous_radon is not None
+            and abs(radon - previous_radon) > ADAPTIVE_RADON_CHANGE * max(previous_radon, 1)
+        ):
+            return True
+        return self._beyond_noise(
+            sensors.get("radon_C_last"), previous.get("radon_C_last")
+        )
+
+    def update(self, sensors: Mapping[str, Any], now: float) -> float:
+        """Take the reading at the UNIX time now; return the next interval."""
+        moving = self._moving(sensors)
+        self._previous = dict(sensors)
+        if moving:
+            self._stable_since = None
+            self.interval = self.minimum
+            return self.interval
+
+        if self._stable_since is None:
+            self._stable_since = now
+        if now - self._stable_since >= ADAPTIVE_STABLE_HOURS * 3600:
+            self.interval = min(self.interval * 2, self.maximum)
+        elif self.interval < self.base:
+            self.interval = min(self.interval * 2, self.base)
+        else:
+            self.interval = self.base
+        return self.interval
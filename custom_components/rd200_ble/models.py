@@ -0,0 +1,31 @@
+"""The RD200 BLE integration models."""
+from __future__ import annotations
+
+import dataclasses
+
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .archive import RD200Archive
+from .rd200_ble import (
+    AdvertisementLog,
+    PulseEstimator,
+    RD200BluetoothDeviceData,
+    RD200Device,
+)
+from .profiler import UpdateProfiler
+from .source import RD200SourceSelector
+from .threshold import ThresholdMonitor
+
+
+@dataclasses.dataclass
+class RD200Data:
+    """Data for the RD200 BLE integration."""
+
+    coordinator: DataUpdateCoordinator[RD200Device]
+    session: RD200BluetoothDeviceData
+    source_selector: RD200SourceSelector
+    archive: RD200Archive
+    estimator: PulseEstimator | None
+    thresholds: ThresholdMonitor
+    profiler: UpdateProfiler
+    advertisement_log: AdvertisementLog | None
@@ -0,0 +1,125 @@
+"""On-demand profiling of RD200 updates."""
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+import cProfile
+import io
+import logging
+import pstats
+import time
+from typing import TypeVar
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# Functions listed in the log summary
+PROFILE_TOP_FUNCTIONS = 15
+
+# Only one profiler can be enabled per thread
+_ACTIVE: UpdateProfiler | None = None
+
+
+class UpdateProfiler:
+    """Profile the next few updates of one entry.
+
+    While a run is profiled cProfile records CPU time of everything on the
+    event loop, and mark() records when each phase of the update ended.
+    A suspended coroutine costs no CPU, so the slow awaits only show up in
+    the phases. When no run is requested, mark() is a single check.
+    """
+
+    def __init__(self, hass: HomeAssistant, name: str) -> None:
+        """Initialize the profiler of the entry called name."""
+        self._hass = hass
+        self._name = name
+        self.remaining = 0
+        self._profile: cProfile.Profile | None = None
+        self._marks: list[tuple[str, float]] | None = None
+        self._phases: dict[str, list[float]] = {}
+
+    @callback
+    def async_start(self, runs: int) -> None:
+        """Profile the next runs updates."""
+        global _ACTIVE  # pylint: disable=global-statement
+        if _ACTIVE is not None and _ACTIVE is not self:
+            raise ServiceValidationError(
+                f"{_ACTIVE._name} is being profiled, try again when it is done"
+            )
+        _ACTIVE = self
+        if self._profile is None:
+            self._profile = cProfile.Profile()
+            self._phases = {}
+        self.remaining = runs
+
+    @callback
+    def async_stop(self) -> None:
+        """Drop a profile in progress."""
+        global _ACTIVE  # pylint: disable=global-statement
+        if _ACTIVE is self:
+            _ACTIVE = None
+        self.remaining = 0
+        self._profile = None
+        self._marks = None
+
+    def mark(self, phase: str) -> None:
+        """Record that phase of the running update ended."""
+        if self._marks is not None:
+            self._marks.append((phase, time.monotonic()))
+
+    async def async_profile(self, update: Callable[[], Awaitable[_T]]) -> _T:
+        """Run one update under the profiler."""
+        profile = self._profile
+        assert profile is not None
+        self._marks = [("", time.monotonic())]
+        profile.enable()
+        try:
+            return await update()
+        finally:
+            profile.disable()
+            # Unless it was stopped while the update ran
+            if self._profile is profile:
+                self.mark("rest")
+                for (_, started), (phase, ended) in zip(self._marks, self._marks[1:]):
+                    self._phases.setdefault(phase, []).append(ended - started)
+                self._marks = None
+                self.remaining -= 1
+                if self.remaining <= 0:
+                    await self._async_finish()
+
+    async def _async_finish(self) -> None:
+        """Write the stats file and log a summary."""
+        profile = self._profile
+        phases = self._phases
+        self.async_stop()
+        assert profile is not None
+
+        path = self._hass.config.path(
+            f"{DOMAIN}_profile_{self._name.replace(':', '').lower()}"
+            f"_{dt_util.utcnow():%Y%m%d%H%M%S}.prof"
+        )
+        await self._hass.async_add_executor_job(profile.dump_stats, path)
+
+        runs = max((len(times) for times in phases.values()), default=0)
+        lines = [f"Profiled {runs} updates of {self._name}, stats written to {path}"]
+        lines.append("Slowest phases (wall time, mean / max):")
+        for phase, times in sorted(
+            phases.items(), key=lambda item: max(item[1]), reverse=True
+        ):
+            lines.append(
+                f"  {phase:<20} {sum(times) / len(times) * 1000:8.1f} ms"
+                f" / {max(times) * 1000:8.1f} ms"
+            )
+        stream = io.StringIO()
+        # By own time; the event loop's idle wait in select() shows up too
+        pstats.Stats(profile, stream=stream).sort_stats(
+            pstats.SortKey.TIME
+        ).print_stats(PROFILE_TOP_FUNCTIONS)
+        lines.append(stream.getvalue())
+        _LOGGER.warning("\n".join(lines))
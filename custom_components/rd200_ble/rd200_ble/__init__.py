@@ -1,8 +1,33 @@
 """Parser for RD200 BLE advertisements."""
 from __future__ import annotations
 
-from .parser import RD200BluetoothDeviceData, RD200Device
+from .advertisement import AdvertisementLog
+from .estimator import ESTIMATE_KEYS, PulseEstimator
+from .parser import (
+    PROTOCOL_V1,
+    PROTOCOL_V2,
+    RD200BluetoothDeviceData,
+    RD200Device,
+    RD200GattCache,
+    merge_device,
+)
+from .singleflight import async_update_device, forget_device
+from .trace import FrameTrace, TraceFrame
 
 __version__ = "0.5.3"
 
-__all__ = ["RD200BluetoothDeviceData", "RD200Device"]
+__all__ = [
+    "AdvertisementLog",
+    "ESTIMATE_KEYS",
+    "FrameTrace",
+    "PROTOCOL_V1",
+    "PROTOCOL_V2",
+    "PulseEstimator",
+    "RD200BluetoothDeviceData",
+    "RD200Device",
+    "RD200GattCache",
+    "TraceFrame",
+    "async_update_device",
+    "forget_device",
+    "merge_device",
+]
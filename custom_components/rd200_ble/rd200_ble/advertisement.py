@@ -0,0 +1,59 @@
+"""Recording of RD200 BLE advertisements"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Any, Iterator
+
+from .const import ADVERTISEMENT_LOG_LENGTH
+
+
+class AdvertisementLog:
+    """The most recent distinct advertisement payloads of one device
+
+    No RD200 firmware is known to broadcast a measurement; the log is there
+    so captures can be compared with the readings to look for one.
+    """
+
+    def __init__(self, maxlen: int = ADVERTISEMENT_LOG_LENGTH) -> None:
+        self._entries: deque[dict[str, Any]] = deque(maxlen=maxlen)
+        self._last: tuple[Any, ...] | None = None
+
+    def append(
+        self,
+        source: str,
+        rssi: int | None,
+        manufacturer_data: dict[int, bytes],
+        service_data: dict[str, bytes],
+    ) -> bool:
+        """Record an advertisement; returns False if its payload is unchanged."""
+        payload = (
+            tuple(sorted(manufacturer_data.items())),
+            tuple(sorted(service_data.items())),
+        )
+        if payload == self._last:
+            return False
+        self._last = payload
+        self._entries.append(
+            {
+                "timestamp": time.time(),
+                "source": source,
+                "rssi": rssi,
+                "manufacturer_data": {
+                    str(key): value.hex() for key, value in manufacturer_data.items()
+                },
+                "service_data": {key: value.hex() for key, value in service_data.items()},
+            }
+        )
+        return True
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def as_list(self) -> list[dict[str, Any]]:
+        """Return all entries, oldest first, for diagnostics."""
+        return list(self._entries)
@@ -1,4 +1,20 @@
 """Constants for RD200 BLE parser"""
 
 BQ_TO_PCI_MULTIPLIER = 0.027
-UPDATE_TIMEOUT = 15
+# Overall deadline of a session, including retries and one reconnect
+UPDATE_TIMEOUT = 30
+# Commands re-sent per session after a missing or malformed reply
+COMMAND_RETRIES = 2
+# Seconds that must be left before the deadline to reconnect after a drop
+RECONNECT_MIN_TIME = 8
+RESULT_REUSE_WINDOW = 30
+TRACE_LENGTH = 64
+# Pulse estimator: completed counting cycles in the window, half-life in
+# cycles of the calibration against the device's value, cycles fitted before
+# an estimate is given and the z value of the confidence interval
+ESTIMATOR_WINDOW = 6
+ESTIMATOR_CALIBRATION_HALF_LIFE = 144
+ESTIMATOR_MIN_CALIBRATION = 6
+ESTIMATOR_Z = 1.96
+# Distinct advertisement payloads kept per device in passive mode
+ADVERTISEMENT_LOG_LENGTH = 64
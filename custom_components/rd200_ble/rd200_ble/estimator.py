@@ -0,0 +1,137 @@
+"""Radon estimate from the pulse counts of the ion chamber"""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Any
+
+from .const import (
+    ESTIMATOR_CALIBRATION_HALF_LIFE,
+    ESTIMATOR_MIN_CALIBRATION,
+    ESTIMATOR_WINDOW,
+    ESTIMATOR_Z,
+)
+
+ESTIMATE_KEYS = ("radon_estimate", "radon_estimate_low", "radon_estimate_high")
+
+
+class PulseEstimator:
+    """Concentration estimate from the pulses of the last few counting cycles.
+
+    The chamber pulses are Poisson distributed with a rate proportional to the
+    radon concentration. The rate is the mean of the completed cycle counts
+    (radon_C_last) in a sliding window, kept as a running sum. The factor
+    turning it into a concentration is a least squares fit through the origin
+    against the device's own radon value, with exponential forgetting, so it
+    follows the device's calibration without needing to know it.
+
+    Concentrations passed in and returned are in Bq/m³.
+    """
+
+    def __init__(
+        self,
+        window: int = ESTIMATOR_WINDOW,
+        half_life: float = ESTIMATOR_CALIBRATION_HALF_LIFE,
+        min_calibration: int = ESTIMATOR_MIN_CALIBRATION,
+        z: float = ESTIMATOR_Z,
+    ) -> None:
+        self.window = window
+        self.min_calibration = min_calibration
+        self.z = z
+        self._decay = 0.5 ** (1 / half_life)
+        self._counts: deque[int] = deque()
+        self._total = 0
+        self._last_pulses: tuple[int, int] | None = None
+        # Decayed sums of radon * rate and rate * rate
+        self._sum_xy = 0.0
+        self._sum_xx = 0.0
+        self._calibrations = 0
+
+    @property
+    def gain(self) -> float | None:
+        """Bq/m³ per pulse per cycle, once enough cycles have been fitted."""
+        if self._calibrations < self.min_calibration or self._sum_xx <= 0:
+            return None
+        return self._sum_xy / self._sum_xx
+
+    def _new_cycle(self, pulses_last: int, pulses_now: int) -> bool:
+        """Return if pulses_last belongs to a cycle not seen before.
+
+        A cycle has completed when the count it ended with changed or when
+        the running count of the current cycle went back down.
+        """
+        if self._last_pulses is None:
+            return True
+        last, now = self._last_pulses
+        return pulses_last != last or pulses_now < now
+
+    def update(
+        self,
+        pulses_last: int | None,
+        pulses_now: int | None,
+        radon: float | None,
+    ) -> dict[str, float | None]:
+        """Add a reading and return the estimate and its confidence bounds."""
+        if pulses_last is not None and pulses_now is not None:
+            if self._new_cycle(pulses_last, pulses_now):
+                self._counts.append(pulses_last)
+                self._total += pulses_last
+                if len(self._counts) > self.window:
+                    self._total -= self._counts.popleft()
+                if radon is not None and len(self._counts) == self.window:
+                    rate = self._total / self.window
+                    self._sum_xy = self._sum_xy * self._decay + radon * rate
+                    self._sum_xx = self._sum_xx * self._decay + rate * rate
+                    self._calibrations += 1
+            self._last_pulses = (pulses_last, pulses_now)
+
+        return self.estimate()
+
+    def estimate(self) -> dict[str, float | None]:
+        """Return the current estimate with a Poisson confidence interval."""
+        if (gain := self.gain) is None or len(self._counts) < self.window:
+            return dict.fromkeys(ESTIMATE_KEYS)
+
+        # Square root approximation of the Poisson interval of the total
+        # count; it stays sensible down to a total of zero.
+        cycles = len(self._counts)
+        half_z = self.z / 2
+        low = max(math.sqrt(self._total) - half_z, 0) ** 2
+        high = (math.sqrt(self._total + 1) + half_z) ** 2
+        return {
+            "radon_estimate": gain * self._total / cycles,
+            "radon_estimate_low": gain * low / cycles,
+            "radon_estimate_high": gain * high / cycles,
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state in a JSON friendly form."""
+        return {
+            "counts": list(self._counts),
+            "last_pulses": list(self._last_pulses) if self._last_pulses else None,
+            "sum_xy": self._sum_xy,
+            "sum_xx": self._sum_xx,
+            "calibrations": self._calibrations,
+        }
+
+    def restore(self, data: dict[str, Any] | None) -> None:
+        """Restore state written by as_dict; invalid data is ignored."""
+        if not data:
+            return
+        try:
+            counts = [int(count) for count in data["counts"]][-self.window :]
+            last_pulses = data.get("last_pulses")
+            sum_xy = float(data["sum_xy"])
+            sum_xx = float(data["sum_xx"])
+            calibrations = int(data["calibrations"])
+        except (KeyError, TypeError, ValueError):
+            return
+        self._counts = deque(counts)
+        self._total = sum(counts)
+        self._last_pulses = (
+            (int(last_pulses[0]), int(last_pulses[1])) if last_pulses else None
+        )
+        self._sum_xy = sum_xy
+        self._sum_xx = sum_xx
+        self._calibrations = calibrations
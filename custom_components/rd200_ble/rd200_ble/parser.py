@@ -5,6 +5,7 @@ from __future__ import annotations
 import asyncio
 import dataclasses
 import struct
+import time
 from collections import namedtuple
 from datetime import datetime
 import logging
@@ -17,8 +18,13 @@ from typing import Any, Callable, Tuple, TypeVar, cast
 from async_interrupt import interrupt
 from bleak import BleakClient, BleakError
 from bleak.backends.device import BLEDevice
-from bleak.backends.service import BleakGATTService
-from bleak_retry_connector import establish_connection, BleakClientWithServiceCache
+from bleak.backends.characteristic import BleakGATTCharacteristic
+from bleak.backends.service import BleakGATTService, BleakGATTServiceCollection
+from bleak_retry_connector import (
+    MAX_CONNECT_ATTEMPTS,
+    BleakClientWithServiceCache,
+    establish_connection,
+)
 
 WrapFuncType = TypeVar("WrapFuncType", bound=Callable[..., Any])
 
@@ -37,8 +43,11 @@ class UnsupportedDeviceError(Exception):
     
 from .const import (
     BQ_TO_PCI_MULTIPLIER,
+    COMMAND_RETRIES,
+    RECONNECT_MIN_TIME,
     UPDATE_TIMEOUT,
 )
+from .trace import FrameTrace
 
 RADON_CHARACTERISTIC_UUID_READ = "00001525-0000-1000-8000-00805f9b34fb"
 RADON_CHARACTERISTIC_UUID_WRITE = "00001524-0000-1000-8000-00805f9b34fb"
@@ -46,6 +55,42 @@ RADON_CHARACTERISTIC_UUID_READ_OLDVERSION = "00001525-1212-efde-1523-785feabcd12
 RADON_CHARACTERISTIC_UUID_WRITE_OLDVERSION = "00001524-1212-efde-1523-785feabcd123"
 WRITE_VALUE = b"\x50"
 
+PROTOCOL_V1 = "v1"
+PROTOCOL_V2 = "v2"
+
+# Commands of a session: opcode, seconds to wait for the reply, log name
+COMMANDS = {
+    PROTOCOL_V2: (
+        (0x50, 8, "_get_radon"),
+        (0x40, 5, "_get_radon_peak"),
+        (0x51, 5, "_get_radon_uptime"),
+    ),
+    PROTOCOL_V1: (
+        (0x50, 5, "_get_radon_oldVersion"),
+        (0x51, 5, "_get_radon_peak_uptime_oldVersion"),
+    ),
+}
+# Command answered with the radon reading; sent first by both protocols
+READING_OPCODE = 0x50
+
+# Accepted reply lengths (minimum, maximum) per protocol and opcode
+FRAME_LENGTHS = {
+    (PROTOCOL_V2, 0x50): (12, 12),
+    (PROTOCOL_V2, 0x40): (68, 68),
+    (PROTOCOL_V2, 0x51): (16, 16),
+    (PROTOCOL_V1, 0x50): (14, None),
+    (PROTOCOL_V1, 0x51): (16, None),
+}
+
+# Probed in order; most units in the field are V2
+CHARACTERISTIC_UUIDS = {
+    PROTOCOL_V2: (RADON_CHARACTERISTIC_UUID_READ, RADON_CHARACTERISTIC_UUID_WRITE),
+    PROTOCOL_V1: (
+        RADON_CHARACTERISTIC_UUID_READ_OLDVERSION,
+        RADON_CHARACTERISTIC_UUID_WRITE_OLDVERSION,
+    ),
+}
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -59,18 +104,81 @@ class RD200Device:
     identifier: str = ""
     address: str = ""
     last_valid_update: str | None = None
+    stale: bool = False
+    # Taken from a session another caller started, see async_update_device
+    shared: bool = False
     sensors: dict[str, str | float | None] = dataclasses.field(
         default_factory=lambda: {}
     )
 
 
+@dataclasses.dataclass
+class RD200GattCache:
+    """Resolved GATT layout of an RD200, kept between sessions"""
+
+    protocol: str
+    read_handle: int
+    write_handle: int
+    services: list[str] = dataclasses.field(default_factory=list)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the cache in a form that can be stored."""
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any] | None) -> RD200GattCache | None:
+        """Restore a stored cache, ignoring anything unusable."""
+        if not data:
+            return None
+        try:
+            return cls(**data)
+        except (TypeError, ValueError):
+            return None
+
+
+def merge_device(
+    cached_device: RD200Device | None, data: RD200Device, last_valid_update: str
+) -> RD200Device | None:
+    """Merge the valid values of a fresh reading over a cached device.
+
+    Returns None when the reading holds no valid value at all.
+    """
+    valid_sensors = {
+        key: value for key, value in data.sensors.items() if value is not None
+    }
+    if not valid_sensors:
+        return None
+
+    merged_sensors = cached_device.sensors.copy() if cached_device else {}
+    merged_sensors.update(valid_sensors)
+    return dataclasses.replace(
+        data,
+        name=data.name or (cached_device.name if cached_device else ""),
+        identifier=data.identifier
+        or (cached_device.identifier if cached_device else ""),
+        hw_version=data.hw_version
+        or (cached_device.hw_version if cached_device else ""),
+        sw_version=data.sw_version
+        or (cached_device.sw_version if cached_device else ""),
+        last_valid_update=last_valid_update,
+        shared=False,
+        sensors=merged_sensors,
+    )
+
+
 # pylint: disable=too-many-locals
 # pylint: disable=too-many-branches
 class RD200BluetoothDeviceData:
-    """Data for RD200 BLE sensors."""
+    """Data for RD200 BLE sensors.
 
-    _event: asyncio.Event | None
+    An instance can live as long as the device is configured; it keeps what
+    it learns between sessions (GATT layout, last frames, reply times).
+    """
+
+    _event: asyncio.Event
     _command_data: bytearray | None
+    _read_char: BleakGATTCharacteristic | None
+    _write_char: BleakGATTCharacteristic | None
 
     def __init__(
         self,
@@ -78,21 +186,55 @@ class RD200BluetoothDeviceData:
         elevation: int | None = None,
         is_metric: bool = True,
         voltage: tuple[float, float] = (2.4, 3.2),
+        gatt_cache: RD200GattCache | None = None,
+        trace: FrameTrace | None = None,
     ):
         super().__init__()
         self.logger = logger
         self.is_metric = is_metric
         self.elevation = elevation
         self.voltage = voltage
+        self.gatt_cache = gatt_cache
+        self.trace = trace
+        self._opcode = 0
+        self._source = ""
         self._command_data = None
-        self._event = None
+        self._event = asyncio.Event()
+        self._read_char = None
+        self._write_char = None
+        self.last_connect_time: float | None = None
+        # Set when the last session could not connect at all
+        self.connect_failed = False
+        # Last valid reply and smoothed reply time in seconds, per opcode
+        self.last_frames: dict[int, bytes] = {}
+        self.reply_times: dict[int, float] = {}
+        # Set when the last session found the reading frame unchanged and
+        # stopped after it; the device had not refreshed since
+        self.unchanged = False
+        # UNIX time of the last session that got a reply
+        self.last_seen: float | None = None
+        self._frames_complete = False
+
+    def reconfigure(
+        self, elevation: int | None = None, is_metric: bool | None = None
+    ) -> None:
+        """Change settings in place, keeping what was learned so far."""
+        if elevation is not None:
+            self.elevation = elevation
+        if is_metric is not None:
+            self.is_metric = is_metric
 
     def notification_handler(self, _: Any, data: bytearray) -> None:
         """Helper for command events"""
         self._command_data = data
+        if self.trace is not None:
+            self.trace.append(
+                self.gatt_cache.protocol if self.gatt_cache else "",
+                self._opcode,
+                self._source,
+                data,
+            )
 
-        if self._event is None:
-            return
         self._event.set()
 
     def disconnect_on_missing_services(func: WrapFuncType) -> WrapFuncType:
@@ -108,70 +250,139 @@ class RD200BluetoothDeviceData:
             try:
                 return await func(self, *args, **kwargs)
             except (BleakServiceMissing, BleakCharacteristicMissing) as ex:
-                logger.warning(
+                client: BleakClientWithServiceCache = args[0]
+                self.logger.warning(
                     "%s: Missing service or characteristic, disconnecting to force refetch of GATT services: %s",
-                    self.name,
+                    client.address,
                     ex,
                 )
-                if self.client:
-                    await self.client.clear_cache()
-                    await self.client.disconnect()
+                # The stored layout no longer matches the device
+                self.gatt_cache = None
+                await client.clear_cache()
+                await client.disconnect()
                 raise
 
         return cast(WrapFuncType, _async_disconnect_on_missing_services_wrap)
 
+    def _detect_protocol(self, services: BleakGATTServiceCollection) -> str | None:
+        """Pick the protocol by which characteristic family the device has."""
+        for protocol, (read_uuid, write_uuid) in CHARACTERISTIC_UUIDS.items():
+            if (
+                services.get_characteristic(read_uuid) is not None
+                and services.get_characteristic(write_uuid) is not None
+            ):
+                return protocol
+        return None
+
     @disconnect_on_missing_services
-    async def _get_radon(self, client: BleakClient, device: RD200Device) -> RD200Device:
+    async def _resolve_characteristics(
+        self, client: BleakClientWithServiceCache
+    ) -> str:
+        """Resolve the protocol and characteristics for this session.
+
+        The protocol and handles stored from an earlier session are used as
+        long as the device lists the same services, as a firmware update
+        may change the layout, and the handles still point at the expected
+        characteristics. Otherwise the service table is probed once and the
+        result cached.
+        """
+        services = client.services
+        service_uuids = [service.uuid for service in services]
+
+        if self.gatt_cache is not None:
+            protocol = self.gatt_cache.protocol
+            read_uuid, write_uuid = CHARACTERISTIC_UUIDS.get(protocol, (None, None))
+            read_char = services.get_characteristic(self.gatt_cache.read_handle)
+            write_char = services.get_characteristic(self.gatt_cache.write_handle)
+            if (
+                self.gatt_cache.services == service_uuids
+                and read_char is not None
+                and write_char is not None
+                and read_char.uuid == read_uuid
+                and write_char.uuid == write_uuid
+            ):
+                self._read_char = read_char
+                self._write_char = write_char
+                return protocol
+            self.logger.debug(
+                "%s: Cached GATT layout does not match, probing again",
+                client.address,
+            )
 
-        self._event = asyncio.Event()
+        protocol = self._detect_protocol(services)
+        if protocol is None:
+            raise BleakCharacteristicMissing("No known radon characteristics found")
+        self.logger.debug("%s: Detected RD200 protocol %s", client.address, protocol)
+
+        read_uuid, write_uuid = CHARACTERISTIC_UUIDS[protocol]
+        self._read_char = services.get_characteristic(read_uuid)
+        self._write_char = services.get_characteristic(write_uuid)
+        self.gatt_cache = RD200GattCache(
+            protocol=protocol,
+            read_handle=self._read_char.handle,
+            write_handle=self._write_char.handle,
+            services=service_uuids,
+        )
+        return protocol
+
+    async def _send_command(
+        self, client: BleakClient, command: bytes, timeout: float, name: str
+    ) -> bytearray | None:
+        """Write a command and wait for the notification that answers it."""
+        self._event.clear()
+        self._command_data = None
+        self._opcode = command[0]
         try:
-            await client.start_notify(
-                RADON_CHARACTERISTIC_UUID_READ, self.notification_handler
-            )
-        except:
-            self.logger.warn("_get_radon Bleak error 1")
-            device.sensors["radon"] = None
-            device.sensors["radon_1day_level"] = None
-            device.sensors["radon_1month_level"] = None
-            device.sensors["radon_C_now"] = None
-            device.sensors["radon_C_last"] = None
-            self._command_data = None
-            return device
-        
-        await client.write_gatt_char(RADON_CHARACTERISTIC_UUID_WRITE, WRITE_VALUE)
+            await client.start_notify(self._read_char, self.notification_handler)
+        except Exception:  # pylint: disable=broad-except
+            self.logger.warn("%s Bleak error 1", name)
+            return None
 
-        # Wait for up to five seconds to see if a
+        await client.write_gatt_char(self._write_char, command)
+        written = time.monotonic()
+
+        # Wait for up to timeout seconds to see if a
         # callback comes in.
         try:
-            await asyncio.wait_for(self._event.wait(), 15)
+            await asyncio.wait_for(self._event.wait(), timeout)
         except asyncio.TimeoutError:
-            self.logger.warn("_get_radon Timeout getting command data.")
-        except:
-            self.logger.warn("_get_radon Bleak error 2")
+            self.logger.warn("%s Timeout getting command data.", name)
+        else:
+            reply_time = time.monotonic() - written
+            previous = self.reply_times.get(self._opcode, reply_time)
+            self.reply_times[self._opcode] = previous + 0.3 * (reply_time - previous)
 
-        await client.stop_notify(RADON_CHARACTERISTIC_UUID_READ)
+        await client.stop_notify(self._read_char)
 
-        if self._command_data is not None and len(self._command_data) == 12:
-            RadonValueBQ = struct.unpack("<H", self._command_data[2:4])[0]
+        data = self._command_data
+        self._command_data = None
+        return data
+
+    def _decode_radon(
+        self, data: bytes | None, device: RD200Device
+    ) -> RD200Device:
+
+        if data is not None and len(data) == 12:
+            RadonValueBQ = struct.unpack("<H", data[2:4])[0]
             device.sensors["radon"] = round(float(RadonValueBQ),2)
             if not self.is_metric:
                 device.sensors["radon"] = round(float(RadonValueBQ) * BQ_TO_PCI_MULTIPLIER,2)
 
-            RadonValueBQ = struct.unpack("<H", self._command_data[4:6])[0]
+            RadonValueBQ = struct.unpack("<H", data[4:6])[0]
             device.sensors["radon_1day_level"] = round(float(RadonValueBQ),2)
             if not self.is_metric:
                 device.sensors["radon_1day_level"] = (
                     round(float(RadonValueBQ) * BQ_TO_PCI_MULTIPLIER,2)
                 )
-            RadonValueBQ = struct.unpack("<H", self._command_data[6:8])[0]
+            RadonValueBQ = struct.unpack("<H", data[6:8])[0]
             device.sensors["radon_1month_level"] = round(float(RadonValueBQ),2)
             if not self.is_metric:
                 device.sensors["radon_1month_level"] = (
                     round(float(RadonValueBQ) * BQ_TO_PCI_MULTIPLIER,2)
                 )
-            RadonValueBQ = struct.unpack("<H", self._command_data[8:10])[0]
+            RadonValueBQ = struct.unpack("<H", data[8:10])[0]
             device.sensors["radon_C_now"] = int(RadonValueBQ)
-            RadonValueBQ = struct.unpack("<H", self._command_data[10:12])[0]
+            RadonValueBQ = struct.unpack("<H", data[10:12])[0]
             device.sensors["radon_C_last"] = int(RadonValueBQ)
         else:
             self.logger.warn("_get_radon Data None")
@@ -180,40 +391,17 @@ class RD200BluetoothDeviceData:
             device.sensors["radon_1month_level"] = None
             device.sensors["radon_C_now"] = None
             device.sensors["radon_C_last"] = None
-            
-        self._command_data = None
+
         return device
 
-    @disconnect_on_missing_services
-    async def _get_radon_uptime(
-        self, client: BleakClient, device: RD200Device
+    def _decode_radon_uptime(
+        self, data: bytes | None, device: RD200Device
     ) -> RD200Device:
 
-        self._event = asyncio.Event()
-        try:
-            await client.start_notify(
-                RADON_CHARACTERISTIC_UUID_READ, self.notification_handler
-            )
-        except:
-            self.logger.warn("_get_radon_uptime Bleak error 1")
-
-        await client.write_gatt_char(RADON_CHARACTERISTIC_UUID_WRITE, b"\x51")
-
-        # Wait for up to fice seconds to see if a
-        # callback comes in.
-        try:
-            await asyncio.wait_for(self._event.wait(), 5)
-        except asyncio.TimeoutError:
-            self.logger.warn("_get_radon_uptime Timeout getting command data.")
-        except:
-            self.logger.warn("_get_radon_uptime Bleak error 2")
-
-        await client.stop_notify(RADON_CHARACTERISTIC_UUID_READ)
-
-        if self._command_data is not None and len(self._command_data) == 16:
+        if data is not None and len(data) == 16:
 
-            uptimeMinutes = struct.unpack("<I", self._command_data[4:8])[0]
-            #uptimeMillis = struct.unpack("<H", self._command_data[3:5])[0]
+            uptimeMinutes = struct.unpack("<I", data[4:8])[0]
+            #uptimeMillis = struct.unpack("<H", data[3:5])[0]
             uptimeMillis = 0
             device.sensors["radon_uptime"] = (
                 int(float(uptimeMinutes) * 60 + float(uptimeMillis) / 1000)
@@ -230,42 +418,24 @@ class RD200BluetoothDeviceData:
         else:
             device.sensors["radon_uptime"] = None
 
-        self._command_data = None
         return device
 
-    async def _get_radon_oldVersion(
-        self, client: BleakClient, device: RD200Device
+    def _decode_radon_oldVersion(
+        self, data: bytes | None, device: RD200Device
     ) -> RD200Device:
 
-        self._event = asyncio.Event()
-        await client.start_notify(
-            RADON_CHARACTERISTIC_UUID_READ_OLDVERSION, self.notification_handler
-        )
-        await client.write_gatt_char(
-            RADON_CHARACTERISTIC_UUID_WRITE_OLDVERSION, WRITE_VALUE
-        )
-
-        # Wait for up to five seconds to see if a
-        # callback comes in.
-        try:
-            await asyncio.wait_for(self._event.wait(), 5)
-        except asyncio.TimeoutError:
-            self.logger.warn("Timeout getting command data.")
-
-        await client.stop_notify(RADON_CHARACTERISTIC_UUID_READ_OLDVERSION)
-
-        if self._command_data is not None and len(self._command_data) >= 13:
-            RadonValuePCI = struct.unpack("<f", self._command_data[2:6])[0]
+        if data is not None and len(data) >= 14:
+            RadonValuePCI = struct.unpack("<f", data[2:6])[0]
             device.sensors["radon"] = round(float(RadonValuePCI),2)
             if self.is_metric:
                 device.sensors["radon"] = round(float(RadonValuePCI) / BQ_TO_PCI_MULTIPLIER,2)
 
-            RadonValuePCI = struct.unpack("<f", self._command_data[6:10])[0]
+            RadonValuePCI = struct.unpack("<f", data[6:10])[0]
             device.sensors["radon_1day_level"] = round(float(RadonValuePCI),2)
             if self.is_metric:
                 device.sensors["radon_1day_level"] = round(float(RadonValuePCI) / BQ_TO_PCI_MULTIPLIER,2)
 
-            RadonValuePCI = struct.unpack("<f", self._command_data[10:14])[0]
+            RadonValuePCI = struct.unpack("<f", data[10:14])[0]
             device.sensors["radon_1month_level"] = round(float(RadonValuePCI),2)
             if self.is_metric:
                 device.sensors["radon_1month_level"] = round(float(RadonValuePCI) / BQ_TO_PCI_MULTIPLIER,2)
@@ -275,37 +445,19 @@ class RD200BluetoothDeviceData:
             device.sensors["radon_1day_level"] = None
             device.sensors["radon_1month_level"] = None
 
-        self._command_data = None
         return device
 
-    async def _get_radon_peak_uptime_oldVersion(
-        self, client: BleakClient, device: RD200Device
+    def _decode_radon_peak_uptime_oldVersion(
+        self, data: bytes | None, device: RD200Device
     ) -> RD200Device:
 
-        self._event = asyncio.Event()
-        await client.start_notify(
-            RADON_CHARACTERISTIC_UUID_READ_OLDVERSION, self.notification_handler
-        )
-        await client.write_gatt_char(
-            RADON_CHARACTERISTIC_UUID_WRITE_OLDVERSION, b"\x51"
-        )
-
-        # Wait for up to five seconds to see if a
-        # callback comes in.
-        try:
-            await asyncio.wait_for(self._event.wait(), 5)
-        except asyncio.TimeoutError:
-            self.logger.warn("Timeout getting command data.")
-
-        await client.stop_notify(RADON_CHARACTERISTIC_UUID_READ_OLDVERSION)
-
-        if self._command_data is not None and len(self._command_data) >= 13:
-            RadonValuePCI = struct.unpack("<f", self._command_data[12:16])[0]
+        if data is not None and len(data) >= 16:
+            RadonValuePCI = struct.unpack("<f", data[12:16])[0]
             device.sensors["radon_peak"] = round(float(RadonValuePCI),2)
             if self.is_metric:
                 device.sensors["radon_peak"] = round(float(RadonValuePCI) / BQ_TO_PCI_MULTIPLIER,2)
 
-            uptimeMinutes = struct.unpack("<I", self._command_data[4:8])[0]
+            uptimeMinutes = struct.unpack("<I", data[4:8])[0]
             device.sensors["radon_uptime"] = (
                 int(uptimeMinutes) * 60
             )
@@ -322,38 +474,14 @@ class RD200BluetoothDeviceData:
             device.sensors["radon_uptime"] = None
             device.sensors["radon_uptime_string"] = None
 
-        self._command_data = None
         return device
 
-    @disconnect_on_missing_services
-    async def _get_radon_peak(
-        self, client: BleakClient, device: RD200Device
+    def _decode_radon_peak(
+        self, data: bytes | None, device: RD200Device
     ) -> RD200Device:
 
-        self._event = asyncio.Event()
-        try:
-            await client.start_notify(
-                RADON_CHARACTERISTIC_UUID_READ, self.notification_handler
-            )
-        except:
-            self.logger.warn("_get_radon_peak Bleak error 1")
-
-        await client.write_gatt_char(RADON_CHARACTERISTIC_UUID_WRITE, b"\x40")
-
-        # Wait for up to one second to see if a
-        # callback comes in.
-
-        try:
-            await asyncio.wait_for(self._event.wait(), 5)
-        except asyncio.TimeoutError:
-            self.logger.warn("_get_radon_peak Timeout getting command data.")
-        except:
-            self.logger.warn("_get_radon_peak Bleak error 2")
-
-        await client.stop_notify(RADON_CHARACTERISTIC_UUID_READ)
-
-        if self._command_data is not None and len(self._command_data) == 68:
-            RadonValueBQ = struct.unpack("<H", self._command_data[51:53])[0]
+        if data is not None and len(data) == 68:
+            RadonValueBQ = struct.unpack("<H", data[51:53])[0]
             device.sensors["radon_peak"] = round(float(RadonValueBQ),2)
             if not self.is_metric:
                 device.sensors["radon_peak"] = (
@@ -362,14 +490,29 @@ class RD200BluetoothDeviceData:
                 _LOGGER.debug(
                     "New Radon Peak: " + str(float(RadonValueBQ) * BQ_TO_PCI_MULTIPLIER)
                 )
-            device.sw_version = self._command_data[22:30].decode('utf-8')
-            device.hw_version = self._command_data[16:21].decode('utf-8')
+            device.sw_version = data[22:30].decode('utf-8')
+            device.hw_version = data[16:21].decode('utf-8')
         else:
             device.sensors["radon_peak"] = None
 
-        self._command_data = None
         return device
 
+    def decode_frame(
+        self, protocol: str, opcode: int, data: bytes | None, device: RD200Device
+    ) -> RD200Device:
+        """Decode a reply to opcode into device, as a live session would."""
+        decoders = {
+            (PROTOCOL_V2, 0x50): self._decode_radon,
+            (PROTOCOL_V2, 0x40): self._decode_radon_peak,
+            (PROTOCOL_V2, 0x51): self._decode_radon_uptime,
+            (PROTOCOL_V1, 0x50): self._decode_radon_oldVersion,
+            (PROTOCOL_V1, 0x51): self._decode_radon_peak_uptime_oldVersion,
+        }
+        if (decoder := decoders.get((protocol, opcode))) is None:
+            self.logger.debug("No decoder for %s opcode %#x", protocol, opcode)
+            return device
+        return decoder(data, device)
+
     def _handle_disconnect(
         self, disconnect_future: asyncio.Future[bool], client: BleakClient
     ) -> None:
@@ -378,52 +521,166 @@ class RD200BluetoothDeviceData:
         if not disconnect_future.done():
             disconnect_future.set_result(True)
             
+    def _frame_valid(self, protocol: str, opcode: int, data: bytes | None) -> bool:
+        """Return whether data is a usable reply to opcode."""
+        if data is None:
+            return False
+        min_length, max_length = FRAME_LENGTHS[(protocol, opcode)]
+        return min_length <= len(data) and (max_length is None or len(data) <= max_length)
+
+    async def _run_commands(
+        self,
+        client: BleakClient,
+        protocol: str,
+        device: RD200Device,
+        pending: list[int],
+        retries: int,
+    ) -> int:
+        """Send the pending commands, retrying failed ones on this connection.
+
+        Answered opcodes are removed from pending. Returns the retries left
+        in the session's budget.
+        """
+        for opcode, timeout, name in COMMANDS[protocol]:
+            if opcode not in pending:
+                continue
+            while True:
+                data = await self._send_command(client, bytes([opcode]), timeout, name)
+                if self._frame_valid(protocol, opcode, data):
+                    unchanged = (
+                        opcode == READING_OPCODE
+                        and self._frames_complete
+                        and self.last_frames.get(opcode) == data
+                    )
+                    self.last_frames[opcode] = bytes(data)
+                    self.decode_frame(protocol, opcode, data, device)
+                    pending.remove(opcode)
+                    if unchanged:
+                        # Nothing was refreshed on the device since the
+                        # last session. The peak only moves with a new
+                        # reading, and the uptime stays the one read with
+                        # the reading, so the other replies are not needed.
+                        self.unchanged = True
+                        pending.clear()
+                        return retries
+                    break
+                if retries <= 0:
+                    break
+                retries -= 1
+                self.logger.debug("%s: Retrying command %#x", client.address, opcode)
+        return retries
+
     async def update_device(self, ble_device: BLEDevice) -> RD200Device:
         """Connects to the device through BLE and retrieves relevant data"""
         device = RD200Device()
         device.name = ble_device.name
         device.address = ble_device.address
-        
-        loop = asyncio.get_running_loop()
-        disconnect_future = loop.create_future()
-        client: BleakClientWithServiceCache = (
-            await establish_connection(  # pylint: disable=line-too-long
-                BleakClientWithServiceCache,
-                ble_device,
-                ble_device.address,
-                disconnected_callback=partial(
-                    self._handle_disconnect, disconnect_future
-                ),
-            )
-        )
-        try:
-            async with (
-                interrupt(
-                    disconnect_future,
-                    DisconnectedError,
-                    f"Disconnected from {client.address}",
-                ),
-                asyncio.timeout(UPDATE_TIMEOUT),
-            ):
+        details = ble_device.details
+        self._source = details.get("source", "") if isinstance(details, dict) else ""
 
-                if ble_device.name.startswith("FR:R2"):
-                    device = await self._get_radon_oldVersion(client, device)
-                    device = await self._get_radon_peak_uptime_oldVersion(client, device)
-                else:
-                    device = await self._get_radon(client, device)
-                    device = await self._get_radon_peak(client, device)
-                    device = await self._get_radon_uptime(client, device)
-
-        except BleakError as err:
-            if "not found" in str(err):  # In future bleak this is a named exception
-                # Clear the char cache since a char is likely
-                # missing from the cache
-                await client.clear_cache()
-            raise
-        except UnsupportedDeviceError:
-            await client.disconnect()
-            raise
-        finally:
-            await client.disconnect()
+        loop = asyncio.get_running_loop()
+        deadline = 0.0
+        protocol: str | None = None
+        pending: list[int] = []
+        retries = COMMAND_RETRIES
+        reconnected = False
+        self.last_connect_time = None
+        self.connect_failed = False
+        self.unchanged = False
+        if self.trace is not None:
+            self.trace.start_session()
+
+        while True:
+            disconnect_future = loop.create_future()
+            connect_started = time.monotonic()
+            try:
+                # A reconnect has to fit in what is left of the session
+                async with asyncio.timeout_at(deadline if reconnected else None):
+                    client: BleakClientWithServiceCache = (
+                        await establish_connection(  # pylint: disable=line-too-long
+                            BleakClientWithServiceCache,
+                            ble_device,
+                            ble_device.address,
+                            disconnected_callback=partial(
+                                self._handle_disconnect, disconnect_future
+                            ),
+                            max_attempts=1 if reconnected else MAX_CONNECT_ATTEMPTS,
+                        )
+                    )
+            except (BleakError, TimeoutError):
+                if not reconnected:
+                    self.connect_failed = True
+                    raise
+                if len(pending) == len(COMMANDS[protocol]):
+                    raise
+                self.logger.debug("%s: Reconnect failed", ble_device.address)
+                break
+            if not reconnected:
+                self.last_connect_time = time.monotonic() - connect_started
+                deadline = loop.time() + UPDATE_TIMEOUT
+            try:
+                async with (
+                    interrupt(
+                        disconnect_future,
+                        DisconnectedError,
+                        f"Disconnected from {client.address}",
+                    ),
+                    asyncio.timeout_at(deadline),
+                ):
+
+                    if protocol is None:
+                        protocol = await self._resolve_characteristics(client)
+                        pending = [opcode for opcode, _, _ in COMMANDS[protocol]]
+                    else:
+                        await self._resolve_characteristics(client)
+                    retries = await self._run_commands(
+                        client, protocol, device, pending, retries
+                    )
+                break
+
+            except DisconnectedError:
+                if (
+                    reconnected
+                    or protocol is None
+                    or deadline - loop.time() < RECONNECT_MIN_TIME
+                ):
+                    if protocol is not None and len(pending) < len(COMMANDS[protocol]):
+                        break
+                    raise
+                # Keep what was decoded and fetch only the missing replies
+                reconnected = True
+                self.logger.debug(
+                    "%s: Disconnected mid-session, reconnecting for %s",
+                    ble_device.address,
+                    [f"{opcode:#x}" for opcode in pending],
+                )
+            except TimeoutError:
+                if protocol is not None and len(pending) < len(COMMANDS[protocol]):
+                    self.logger.debug(
+                        "%s: Session deadline reached, keeping partial reading",
+                        ble_device.address,
+                    )
+                    break
+                raise
+            except BleakError as err:
+                if "not found" in str(err):  # In future bleak this is a named exception
+                    # Clear the char cache since a char is likely
+                    # missing from the cache
+                    self.gatt_cache = None
+                    await client.clear_cache()
+                raise
+            except UnsupportedDeviceError:
+                await client.disconnect()
+                raise
+            finally:
+                self._read_char = None
+                self._write_char = None
+                await client.disconnect()
+
+        if not self.unchanged:
+            self._frames_complete = not pending
+        for opcode in pending:
+            self.decode_frame(protocol, opcode, None, device)
+        self.last_seen = time.time()
 
         return device
@@ -0,0 +1,76 @@
+"""Single-flight de-duplication of RD200 BLE sessions"""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import logging
+import time
+
+from bleak.backends.device import BLEDevice
+
+from .const import RESULT_REUSE_WINDOW
+from .parser import RD200BluetoothDeviceData, RD200Device
+
+_LOGGER = logging.getLogger(__name__)
+
+# One in-flight session and one recent result per (address, is_metric). The
+# unit system is part of the key because the decoded values depend on it.
+_IN_FLIGHT: dict[tuple[str, bool], asyncio.Task[RD200Device]] = {}
+_RESULTS: dict[tuple[str, bool], tuple[float, RD200Device]] = {}
+
+
+def _copy_device(device: RD200Device, shared: bool) -> RD200Device:
+    """Return a copy callers can modify without affecting each other."""
+    return dataclasses.replace(device, shared=shared, sensors=device.sensors.copy())
+
+
+async def async_update_device(
+    rd200: RD200BluetoothDeviceData,
+    ble_device: BLEDevice,
+    reuse_window: float = RESULT_REUSE_WINDOW,
+) -> RD200Device:
+    """Update the device, sharing one BLE session between concurrent callers.
+
+    If a session for the same address is already running, wait for it and
+    return its result instead of opening a second connection. A successful
+    result is also reused for ``reuse_window`` seconds. Results of a session
+    the caller did not start are marked ``shared``; whoever started it has
+    already taken that reading.
+    """
+    key = (ble_device.address, rd200.is_metric)
+
+    if reuse_window > 0 and (cached := _RESULTS.get(key)) is not None:
+        finished, device = cached
+        if time.monotonic() - finished < reuse_window:
+            _LOGGER.debug("Reusing recent result for %s", ble_device.address)
+            return _copy_device(device, True)
+
+    task = _IN_FLIGHT.get(key)
+    joined = task is not None
+    if task is None:
+        task = asyncio.get_running_loop().create_task(
+            rd200.update_device(ble_device)
+        )
+        _IN_FLIGHT[key] = task
+
+        def _done(task: asyncio.Task[RD200Device]) -> None:
+            if _IN_FLIGHT.get(key) is task:
+                del _IN_FLIGHT[key]
+            if task.cancelled() or task.exception() is not None:
+                return
+            _RESULTS[key] = (time.monotonic(), task.result())
+
+        task.add_done_callback(_done)
+    else:
+        _LOGGER.debug("Joining in-flight update for %s", ble_device.address)
+
+    # Shield the shared session so one caller giving up does not cancel it
+    # for the others.
+    return _copy_device(await asyncio.shield(task), joined)
+
+
+def forget_device(address: str) -> None:
+    """Drop any reusable result for the address."""
+    for key in [key for key in _RESULTS if key[0] == address]:
+        del _RESULTS[key]
@@ -0,0 +1,82 @@
+"""Capture of raw RD200 protocol frames"""
+
+from __future__ import annotations
+
+import dataclasses
+import time
+from collections import deque
+from typing import Any, Iterable, Iterator
+
+from .const import TRACE_LENGTH
+
+
+@dataclasses.dataclass(frozen=True)
+class TraceFrame:
+    """A notification received from the device"""
+
+    timestamp: float
+    protocol: str
+    opcode: int
+    source: str
+    data: bytes
+    # Number of the update session the frame arrived in; None in traces
+    # written before sessions were recorded
+    session: int | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the frame in a JSON friendly form."""
+        return {
+            "timestamp": self.timestamp,
+            "protocol": self.protocol,
+            "opcode": self.opcode,
+            "source": self.source,
+            "data": self.data.hex(),
+            "session": self.session,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> TraceFrame:
+        """Restore a frame written by as_dict."""
+        return cls(
+            timestamp=float(data["timestamp"]),
+            protocol=data["protocol"],
+            opcode=int(data["opcode"]),
+            source=data.get("source", ""),
+            data=bytes.fromhex(data["data"]),
+            session=data.get("session"),
+        )
+
+
+class FrameTrace:
+    """Bounded ring buffer of the most recent frames of one device"""
+
+    def __init__(self, maxlen: int = TRACE_LENGTH) -> None:
+        self._frames: deque[TraceFrame] = deque(maxlen=maxlen)
+        self._session = 0
+
+    def start_session(self) -> None:
+        """Mark the start of an update; later frames belong to it."""
+        self._session += 1
+
+    def append(self, protocol: str, opcode: int, source: str, data: bytes) -> None:
+        """Record a frame with a monotonic timestamp."""
+        self._frames.append(
+            TraceFrame(
+                time.monotonic(), protocol, opcode, source, bytes(data), self._session
+            )
+        )
+
+    def __iter__(self) -> Iterator[TraceFrame]:
+        return iter(self._frames)
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def as_list(self) -> list[dict[str, Any]]:
+        """Return all frames, oldest first, for diagnostics."""
+        return [frame.as_dict() for frame in self._frames]
+
+    @staticmethod
+    def frames_from_list(data: Iterable[dict[str, Any]]) -> list[TraceFrame]:
+        """Restore frames from a diagnostics dump."""
+        return [TraceFrame.from_dict(frame) for frame in data]
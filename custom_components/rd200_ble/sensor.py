@@ -4,7 +4,7 @@ from __future__ import annotations
 import logging
 import dataclasses
 
-from .rd200_ble import RD200Device
+from .rd200_ble import ESTIMATE_KEYS, RD200Device
 
 from homeassistant import config_entries
 from homeassistant.components.sensor import (
@@ -23,7 +23,7 @@ from homeassistant.const import (
     UnitOfTime,
 )
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.device_registry import CONNECTION_BLUETOOTH
+from homeassistant.helpers.device_registry import CONNECTION_BLUETOOTH, DeviceEntryType
 from homeassistant.helpers.entity import DeviceInfo, EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import StateType
@@ -33,7 +33,9 @@ from homeassistant.helpers.update_coordinator import (
 )
 from homeassistant.util.unit_system import METRIC_SYSTEM
 
-from .const import DOMAIN, VOLUME_BECQUEREL, VOLUME_PICOCURIE, COUNT_PULSES
+from .aggregate import RD200Aggregate
+from .const import CONF_AGGREGATE, DOMAIN, VOLUME_BECQUEREL, VOLUME_PICOCURIE, COUNT_PULSES
+from .models import RD200Data
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -66,6 +68,27 @@ SENSORS_MAPPING_TEMPLATE: dict[str, SensorEntityDescription] = {
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:radioactive-circle-outline",
     ),
+    "radon_estimate": SensorEntityDescription(
+        key="radon_estimate",
+        native_unit_of_measurement=VOLUME_BECQUEREL,
+        name="Radon Estimate",
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:radioactive",
+    ),
+    "radon_estimate_low": SensorEntityDescription(
+        key="radon_estimate_low",
+        native_unit_of_measurement=VOLUME_BECQUEREL,
+        name="Radon Estimate Low",
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:radioactive",
+    ),
+    "radon_estimate_high": SensorEntityDescription(
+        key="radon_estimate_high",
+        native_unit_of_measurement=VOLUME_BECQUEREL,
+        name="Radon Estimate High",
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:radioactive",
+    ),
     "radon_1day_level": SensorEntityDescription(
         key="radon_1day_level",
         native_unit_of_measurement=VOLUME_BECQUEREL,
@@ -113,6 +136,28 @@ SENSORS_MAPPING_TEMPLATE: dict[str, SensorEntityDescription] = {
     ),
 }
 
+AGGREGATE_SENSORS: tuple[SensorEntityDescription, ...] = (
+    SensorEntityDescription(
+        key="max",
+        native_unit_of_measurement=VOLUME_BECQUEREL,
+        name="Radon Max",
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:radioactive",
+    ),
+    SensorEntityDescription(
+        key="mean",
+        native_unit_of_measurement=VOLUME_BECQUEREL,
+        name="Radon Mean",
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:radioactive",
+    ),
+    SensorEntityDescription(
+        key="worst",
+        name="Radon Worst Room",
+        icon="mdi:home-alert-outline",
+    ),
+)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -122,7 +167,24 @@ async def async_setup_entry(
     """Set up the RD200 BLE sensors."""
     is_metric = hass.config.units is METRIC_SYSTEM
 
-    coordinator: DataUpdateCoordinator[RD200Device] = hass.data[DOMAIN][entry.entry_id]
+    if entry.data.get(CONF_AGGREGATE):
+        aggregate: RD200Aggregate = hass.data[DOMAIN][entry.entry_id]
+        async_add_entities(
+            RD200AggregateSensor(
+                entry,
+                aggregate,
+                description
+                if is_metric or description.native_unit_of_measurement is None
+                else dataclasses.replace(
+                    description, native_unit_of_measurement=VOLUME_PICOCURIE
+                ),
+            )
+            for description in AGGREGATE_SENSORS
+        )
+        return
+
+    data: RD200Data = hass.data[DOMAIN][entry.entry_id]
+    coordinator = data.coordinator
 
     # we need to change some units
     sensors_mapping = SENSORS_MAPPING_TEMPLATE.copy()
@@ -138,7 +200,15 @@ async def async_setup_entry(
 
     entities = []
     _LOGGER.debug("got sensors: %s", coordinator.data.sensors)
-    for sensor_type, sensor_value in coordinator.data.sensors.items():
+    sensor_types = dict(coordinator.data.sensors)
+    for key in ESTIMATE_KEYS:
+        # The estimate stays unknown until it is calibrated, so it may not be
+        # in the first reading yet; a cached one outlives turning it off
+        if data.estimator is not None:
+            sensor_types.setdefault(key, None)
+        else:
+            sensor_types.pop(key, None)
+    for sensor_type, sensor_value in sensor_types.items():
         if sensor_type not in sensors_mapping:
             _LOGGER.debug(
                 "Unknown sensor type detected: %s, %s",
@@ -199,9 +269,52 @@ class RD200Sensor(CoordinatorEntity[DataUpdateCoordinator[RD200Device]], SensorE
             return None
 
     @property
-    def extra_state_attributes(self) -> dict[str, str] | None:
-        """Return the time at which a valid device value was last received."""
-        last_valid_update = self.coordinator.data.last_valid_update
-        if last_valid_update is None:
-            return None
-        return {"last_valid_update": last_valid_update}
+    def extra_state_attributes(self) -> dict[str, str | bool] | None:
+        """Return when a valid value was last received and if it is stale."""
+        attributes: dict[str, str | bool] = {}
+        if (last_valid_update := self.coordinator.data.last_valid_update) is not None:
+            attributes["last_valid_update"] = last_valid_update
+        if self.coordinator.data.stale:
+            attributes["stale"] = True
+        return attributes or None
+
+
+class RD200AggregateSensor(SensorEntity):
+    """Building-wide radon sensor over all RD200 devices."""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    def __init__(
+        self,
+        entry: config_entries.ConfigEntry,
+        aggregate: RD200Aggregate,
+        entity_description: SensorEntityDescription,
+    ) -> None:
+        """Initialize the aggregate sensor."""
+        self.entity_description = entity_description
+        self._aggregate = aggregate
+        self._attr_unique_id = f"{entry.entry_id}_{entity_description.key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, entry.entry_id)},
+            name=entry.title,
+            manufacturer="FTLAB Co., LTD.",
+            model="RD200 aggregate",
+            entry_type=DeviceEntryType.SERVICE,
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Follow the aggregate."""
+        self.async_on_remove(
+            self._aggregate.async_add_listener(self.async_write_ha_state)
+        )
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the aggregate value."""
+        return getattr(self._aggregate, self.entity_description.key)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, int]:
+        """Return the number of devices with a fresh value."""
+        return {"devices": self._aggregate.count}
@@ -0,0 +1,172 @@
+"""Services for the RD200 BLE integration."""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Final
+
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv, selector
+from homeassistant.util import dt as dt_util
+
+from .models import RD200Data
+from .const import CONF_AGGREGATE, DOMAIN, VOLUME_BECQUEREL
+from .statistics import STATISTICS_KEYS, async_import_readings
+
+ATTR_CONFIG_ENTRY: Final = "config_entry"
+ATTR_END: Final = "end"
+ATTR_EXPORT: Final = "export"
+ATTR_MAX_POINTS: Final = "max_points"
+ATTR_READINGS: Final = "readings"
+ATTR_RUNS: Final = "runs"
+ATTR_START: Final = "start"
+ATTR_TIMESTAMP: Final = "timestamp"
+
+SERVICE_IMPORT_READINGS: Final = "import_readings"
+SERVICE_PROFILE: Final = "profile"
+SERVICE_QUERY_HISTORY: Final = "query_history"
+
+DEFAULT_MAX_POINTS = 500
+DEFAULT_PROFILE_RUNS = 3
+
+IMPORT_READINGS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY): selector.ConfigEntrySelector(
+            {"integration": DOMAIN}
+        ),
+        vol.Required(ATTR_READINGS): vol.All(
+            cv.ensure_list,
+            [
+                vol.Schema(
+                    {
+                        vol.Required(ATTR_TIMESTAMP): cv.datetime,
+                        **{
+                            vol.Optional(key): vol.Any(None, vol.Coerce(float))
+                            for key in STATISTICS_KEYS
+                        },
+                    }
+                )
+            ],
+        ),
+    }
+)
+
+QUERY_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY): selector.ConfigEntrySelector(
+            {"integration": DOMAIN}
+        ),
+        vol.Required(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+        vol.Optional(ATTR_MAX_POINTS, default=DEFAULT_MAX_POINTS): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=10000)
+        ),
+        vol.Optional(ATTR_EXPORT, default=False): cv.boolean,
+    }
+)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY): selector.ConfigEntrySelector(
+            {"integration": DOMAIN}
+        ),
+        vol.Optional(ATTR_RUNS, default=DEFAULT_PROFILE_RUNS): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=50)
+        ),
+    }
+)
+
+
+def _get_entry(hass: HomeAssistant, call: ServiceCall) -> ConfigEntry:
+    """Return the loaded config entry a service call is for."""
+    entry_id: str = call.data[ATTR_CONFIG_ENTRY]
+    entry = hass.config_entries.async_get_entry(entry_id)
+    if entry is None or entry.domain != DOMAIN or entry.data.get(CONF_AGGREGATE):
+        raise ServiceValidationError(f"Unknown RD200 entry {entry_id}")
+    if entry.state is not ConfigEntryState.LOADED:
+        raise ServiceValidationError(f"{entry.title} is not loaded")
+    return entry
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the RD200 BLE services."""
+
+    async def _async_import_readings(call: ServiceCall) -> ServiceResponse:
+        entry = _get_entry(hass, call)
+        hours = await async_import_readings(
+            hass,
+            entry,
+            (
+                (reading[ATTR_TIMESTAMP], reading)
+                for reading in call.data[ATTR_READINGS]
+            ),
+        )
+        return {"hours": hours}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_IMPORT_READINGS,
+        _async_import_readings,
+        schema=IMPORT_READINGS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def _async_query_history(call: ServiceCall) -> ServiceResponse:
+        entry = _get_entry(hass, call)
+        data: RD200Data = hass.data[DOMAIN][entry.entry_id]
+        archive = data.archive
+        start: datetime = dt_util.as_utc(call.data[ATTR_START])
+        end: datetime = dt_util.as_utc(call.data.get(ATTR_END) or dt_util.utcnow())
+        if start > end:
+            raise ServiceValidationError("start must be before end")
+
+        if call.data[ATTR_EXPORT]:
+            path = hass.config.path(
+                f"{DOMAIN}_{entry.unique_id.replace(':', '').lower()}"
+                f"_{start:%Y%m%d%H%M}_{end:%Y%m%d%H%M}.csv"
+            )
+            rows = await hass.async_add_executor_job(
+                archive.export_csv, start.timestamp(), end.timestamp(), path
+            )
+            return {"path": path, "rows": rows, "unit": VOLUME_BECQUEREL}
+
+        points = await hass.async_add_executor_job(
+            archive.query,
+            start.timestamp(),
+            end.timestamp(),
+            call.data[ATTR_MAX_POINTS],
+        )
+        for point in points:
+            point[ATTR_TIMESTAMP] = dt_util.utc_from_timestamp(
+                point[ATTR_TIMESTAMP]
+            ).isoformat()
+        return {"points": points, "unit": VOLUME_BECQUEREL}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_QUERY_HISTORY,
+        _async_query_history,
+        schema=QUERY_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def _async_profile(call: ServiceCall) -> None:
+        entry = _get_entry(hass, call)
+        data: RD200Data = hass.data[DOMAIN][entry.entry_id]
+        data.profiler.async_start(call.data[ATTR_RUNS])
+        # Start with a poll now rather than at the next interval
+        await data.coordinator.async_request_refresh()
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_PROFILE, _async_profile, schema=PROFILE_SCHEMA
+    )
@@ -0,0 +1,109 @@
+"""Bluetooth source selection for RD200 BLE connections."""
+from __future__ import annotations
+
+import dataclasses
+import logging
+
+from bleak.backends.device import BLEDevice
+
+from homeassistant.components import bluetooth
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    SOURCE_CONNECT_TIME_SMOOTHING,
+    SOURCE_DEFAULT_CONNECT_TIME,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class SourceStats:
+    """Connection history of one Bluetooth source for one device."""
+
+    attempts: int = 0
+    successes: int = 0
+    consecutive_failures: int = 0
+    connect_time: float | None = None
+
+    @property
+    def success_rate(self) -> float:
+        """Return the success rate, starting from an even prior."""
+        return (self.successes + 1) / (self.attempts + 2)
+
+    @property
+    def expected_cost(self) -> float:
+        """Return the expected seconds spent per successful connection."""
+        connect_time = self.connect_time or SOURCE_DEFAULT_CONNECT_TIME
+        # Sources that keep failing are pushed back quickly so the next
+        # session rotates to another one.
+        return connect_time / self.success_rate * 2**self.consecutive_failures
+
+
+class RD200SourceSelector:
+    """Pick the connectable source with the best record for a device.
+
+    Sources not tried yet go first, loudest first; after that the one with
+    the lowest expected cost per successful connection wins.
+    """
+
+    def __init__(self, hass: HomeAssistant, address: str) -> None:
+        """Initialize the selector."""
+        self._hass = hass
+        self._address = address
+        self.stats: dict[str, SourceStats] = {}
+
+    @callback
+    def async_best_device(self) -> tuple[BLEDevice | None, str | None]:
+        """Return a fresh BLEDevice from the best source and its name."""
+        candidates = bluetooth.async_scanner_devices_by_address(
+            self._hass, self._address, connectable=True
+        )
+        if not candidates:
+            return (
+                bluetooth.async_ble_device_from_address(self._hass, self._address),
+                None,
+            )
+
+        def _rank(
+            candidate: bluetooth.BluetoothScannerDevice,
+        ) -> tuple[bool, float, int]:
+            # Every source is tried once before the track records are
+            # compared; an untried source says nothing about how it connects.
+            stats = self.stats.get(candidate.scanner.source)
+            if stats is None or not stats.attempts:
+                return (False, 0.0, -candidate.advertisement.rssi)
+            return (True, stats.expected_cost, -candidate.advertisement.rssi)
+
+        best = min(candidates, key=_rank)
+        if len(candidates) > 1:
+            _LOGGER.debug(
+                "%s: Connecting through %s (rssi %s) out of %s sources",
+                self._address,
+                best.scanner.name,
+                best.advertisement.rssi,
+                len(candidates),
+            )
+        return best.ble_device, best.scanner.source
+
+    @callback
+    def async_record(
+        self, source: str | None, success: bool, connect_time: float | None
+    ) -> None:
+        """Record the outcome of a session through a source."""
+        if source is None:
+            return
+        stats = self.stats.setdefault(source, SourceStats())
+        stats.attempts += 1
+        if not success:
+            stats.consecutive_failures += 1
+            return
+        stats.successes += 1
+        stats.consecutive_failures = 0
+        if connect_time is not None:
+            if stats.connect_time is None:
+                stats.connect_time = connect_time
+            else:
+                stats.connect_time += SOURCE_CONNECT_TIME_SMOOTHING * (
+                    connect_time - stats.connect_time
+                )
@@ -0,0 +1,108 @@
+"""Import of recovered RD200 readings into long-term statistics."""
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from datetime import datetime
+import logging
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_import_statistics
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+from homeassistant.util.unit_system import METRIC_SYSTEM
+
+from .const import DOMAIN, VOLUME_BECQUEREL, VOLUME_PICOCURIE
+from .models import RD200Data
+
+_LOGGER = logging.getLogger(__name__)
+
+STATISTICS_KEYS = ("radon", "radon_1day_level", "radon_1month_level")
+
+
+def hourly_statistics(
+    readings: Iterable[tuple[datetime, Mapping[str, float | None]]],
+    keys: Iterable[str] = STATISTICS_KEYS,
+) -> dict[str, list[StatisticData]]:
+    """Roll timestamped readings up into hourly mean, min and max.
+
+    All keys are accumulated in a single pass over the readings, which do
+    not need to be sorted.
+    """
+    keys = tuple(keys)
+    # key -> hour -> [sum, count, min, max]
+    buckets: dict[str, dict[datetime, list[float]]] = {key: {} for key in keys}
+    for timestamp, values in readings:
+        hour = dt_util.as_utc(timestamp).replace(minute=0, second=0, microsecond=0)
+        for key in keys:
+            if (value := values.get(key)) is None:
+                continue
+            if (bucket := buckets[key].get(hour)) is None:
+                buckets[key][hour] = [value, 1, value, value]
+                continue
+            bucket[0] += value
+            bucket[1] += 1
+            if value < bucket[2]:
+                bucket[2] = value
+            if value > bucket[3]:
+                bucket[3] = value
+
+    return {
+        key: [
+            StatisticData(start=hour, mean=total / count, min=low, max=high)
+            for hour, (total, count, low, high) in sorted(hours.items())
+        ]
+        for key, hours in buckets.items()
+        if hours
+    }
+
+
+async def async_import_readings(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    readings: Iterable[tuple[datetime, Mapping[str, float | None]]],
+) -> int:
+    """Write readings of a device into long-term statistics in one batch.
+
+    Values must be in the units of the device's sensors. Every hour that has
+    readings replaces the stored statistics row of that hour. The hourly
+    roll-up of a large batch runs in the executor. Returns the number of
+    hourly rows written.
+    """
+    if "recorder" not in hass.config.components:
+        raise HomeAssistantError("The recorder is not running")
+
+    data: RD200Data = hass.data[DOMAIN][entry.entry_id]
+    device = data.coordinator.data
+    name = f"{device.name} {device.identifier}"
+    unit = (
+        VOLUME_BECQUEREL if hass.config.units is METRIC_SYSTEM else VOLUME_PICOCURIE
+    )
+    entity_registry = er.async_get(hass)
+
+    hourly = await hass.async_add_executor_job(hourly_statistics, list(readings))
+    written = 0
+    for key, statistics in hourly.items():
+        entity_id = entity_registry.async_get_entity_id(
+            Platform.SENSOR, DOMAIN, f"{name}_{key}"
+        )
+        if entity_id is None:
+            _LOGGER.debug("No %s sensor for %s, skipping import", key, name)
+            continue
+        async_import_statistics(
+            hass,
+            StatisticMetaData(
+                has_mean=True,
+                has_sum=False,
+                name=None,
+                source="recorder",
+                statistic_id=entity_id,
+                unit_of_measurement=unit,
+            ),
+            statistics,
+        )
+        written += len(statistics)
+    return written
@@ -0,0 +1,86 @@
+"""Radon threshold crossings evaluated on each RD200 reading."""
+from __future__ import annotations
+
+import dataclasses
+from collections.abc import Mapping
+from typing import Any
+
+THRESHOLD_KEYS = ("radon", "radon_1day_level", "radon_1month_level")
+
+
+@dataclasses.dataclass
+class ThresholdState:
+    """Where a value stands against its threshold."""
+
+    threshold: float
+    above: bool = False
+    # When the value first stood on the other side, while that lasts
+    pending_since: float | None = None
+
+
+class ThresholdMonitor:
+    """Report values that cross their threshold and stay across.
+
+    A value goes above when it reaches the threshold and back below when it
+    falls under the threshold minus the hysteresis; either way it has to
+    stay there for min_duration seconds before the crossing counts.
+    """
+
+    def __init__(
+        self,
+        thresholds: Mapping[str, float],
+        hysteresis: float = 0,
+        min_duration: float = 0,
+    ) -> None:
+        """Initialize the monitor; thresholds of 0 are left out."""
+        self.hysteresis = hysteresis
+        self.min_duration = min_duration
+        self.states = {
+            key: ThresholdState(threshold)
+            for key, threshold in thresholds.items()
+            if threshold
+        }
+
+    def evaluate(
+        self, sensors: Mapping[str, Any], now: float
+    ) -> list[tuple[str, float, ThresholdState]]:
+        """Feed a reading taken at the UNIX time now.
+
+        Returns (key, value, state) of every value that crossed.
+        """
+        crossings: list[tuple[str, float, ThresholdState]] = []
+        for key, state in self.states.items():
+            if (value := sensors.get(key)) is None:
+                continue
+            if state.above:
+                across = value < state.threshold - self.hysteresis
+            else:
+                across = value >= state.threshold
+            if not across:
+                state.pending_since = None
+                continue
+            if state.pending_since is None:
+                state.pending_since = now
+            if now - state.pending_since >= self.min_duration:
+                state.above = not state.above
+                state.pending_since = None
+                crossings.append((key, value, state))
+        return crossings
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the states in a JSON friendly form."""
+        return {key: dataclasses.asdict(state) for key, state in self.states.items()}
+
+    def restore(self, data: Mapping[str, Any] | None) -> None:
+        """Restore states written by as_dict.
+
+        A state saved for another threshold value starts over.
+        """
+        for key, saved in (data or {}).items():
+            state = self.states.get(key)
+            if state is None or not isinstance(saved, Mapping):
+                continue
+            if saved.get("threshold") != state.threshold:
+                continue
+            state.above = bool(saved.get("above"))
+            state.pending_since = saved.get("pending_since")
@@ -0,0 +1,530 @@
+"""Load test of the RD200 integration with simulated devices.
+
+Stands up Home Assistant in a temporary config directory with the
+integration from this checkout, a fake Bluetooth manager and simulated
+RD200s answering over a fake GATT client, so the real parser, coordinators,
+Store and sensor entities are exercised. Every entry is set up, restarted
+from its snapshot and polled for a number of rounds, and the run reports:
+
+    setup time        fresh setup and restart of all entries, and the
+                      background first refreshes after the restart, seconds
+    sessions          BLE sessions actually run per poll round, and the
+                      share of them through the better of two sources
+    loop lag          max and 99th percentile event loop delay, ms
+    rss per entry     growth of the peak RSS over the run, KiB per entry
+    state writes      per poll round, and per minute at the scan interval
+    store bytes       bytes written through Store, and into the archive
+
+    python load_test.py --entries 10 100 500
+    python load_test.py --entries 100 --fail 0.1 --drop 0.05 --unchanged 0.6
+
+Every device is heard by two simulated proxies; the far one is louder but
+connects three times slower and fails three times as often, so the source
+selection has something to choose. The run fails unless the near one
+carried most sessions of the last poll round. Each size runs in a fresh process so the peak RSS
+belongs to that size alone. Needs homeassistant and the integration's
+requirements installed.
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import random
+import resource
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from types import MappingProxyType, SimpleNamespace
+from unittest.mock import patch
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+DOMAIN = "rd200_ble"
+# Event loop lag is sampled this often, seconds
+LAG_INTERVAL = 0.01
+# Simulated proxies: source, connect latency and failure rate multipliers
+SOURCES = (("proxy-near", 1, 1), ("proxy-far", 3, 3))
+
+
+class SimulatedRD200:
+    """A V2 RD200 whose readings drift between sessions."""
+
+    def __init__(self, index, rng, args):
+        self.index = index
+        self.address = "AA:BB:CC:%02X:%02X:%02X" % (
+            (index >> 16) & 0xFF,
+            (index >> 8) & 0xFF,
+            index & 0xFF,
+        )
+        self.name = f"FR:RU{index:05d}"
+        self.rng = rng
+        self.args = args
+        self.radon = rng.randint(20, 300)
+        self.day = self.radon
+        self.month = self.radon
+        self.pulses = (0, 0)
+        self.uptime = rng.randint(0, 1_000_000)
+
+    def start_session(self):
+        """Move the readings on, unless the device has not refreshed yet."""
+        if self.rng.random() < self.args.unchanged:
+            return
+        self.radon = max(0, self.radon + self.rng.randint(-10, 10))
+        self.day += (self.radon - self.day) // 6
+        self.month += (self.radon - self.month) // 30
+        self.pulses = (self.rng.randint(0, 20), self.rng.randint(0, 20))
+        self.uptime += 10
+
+    def reply(self, opcode):
+        if opcode == 0x50:
+            return bytes([0x50, 10]) + struct.pack(
+                "<HHHHH", self.radon, self.day, self.month, *self.pulses
+            )
+        if opcode == 0x40:
+            frame = bytearray(68)
+            frame[0] = 0x40
+            frame[16:21] = b"RD200"
+            frame[22:30] = b"V3.0.1  "
+            frame[51:53] = struct.pack("<H", max(self.radon, self.day))
+            return bytes(frame)
+        frame = bytearray(16)
+        frame[0] = opcode
+        frame[4:8] = struct.pack("<I", self.uptime)
+        return bytes(frame)
+
+
+class FakeCharacteristic:
+    def __init__(self, handle, uuid):
+        self.handle = handle
+        self.uuid = uuid
+
+
+class FakeService:
+    uuid = "00001523-0000-1000-8000-00805f9b34fb"
+
+
+class FakeServices:
+    def __init__(self, read_uuid, write_uuid):
+        self._chars = {
+            10: FakeCharacteristic(10, read_uuid),
+            12: FakeCharacteristic(12, write_uuid),
+        }
+
+    def get_characteristic(self, specifier):
+        if isinstance(specifier, int):
+            return self._chars.get(specifier)
+        return next(
+            (char for char in self._chars.values() if char.uuid == specifier), None
+        )
+
+    def __iter__(self):
+        return iter([FakeService()])
+
+
+class FakeClient:
+    """GATT client of one session with a simulated RD200."""
+
+    def __init__(self, device, services, disconnected_callback):
+        self.address = device.address
+        self.services = services
+        self.is_connected = True
+        self._device = device
+        self._disconnected_callback = disconnected_callback
+        self._handler = None
+
+    async def start_notify(self, char, handler):
+        self._handler = handler
+
+    async def stop_notify(self, char):
+        pass
+
+    async def write_gatt_char(self, char, value, response=None):
+        args = self._device.args
+        rng = self._device.rng
+        loop = asyncio.get_running_loop()
+        if rng.random() < args.drop:
+            self.is_connected = False
+            loop.call_soon(self._disconnected_callback, self)
+            return
+        if rng.random() < args.silent:
+            return
+        loop.call_later(
+            args.reply_latency,
+            self._handler,
+            char,
+            bytearray(self._device.reply(value[0])),
+        )
+
+    async def disconnect(self):
+        self.is_connected = False
+        return True
+
+    async def clear_cache(self):
+        return True
+
+
+class Metrics:
+    def __init__(self):
+        self.lags = []
+        self.state_writes = 0
+        self.store_bytes = 0
+        self.sessions = {source: 0 for source, _, _ in SOURCES}
+
+    async def sample_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.lags.append(loop.time() - started - LAG_INTERVAL)
+
+    def lag_ms(self):
+        if not self.lags:
+            return 0.0, 0.0
+        lags = sorted(self.lags)
+        return (
+            round(lags[-1] * 1000, 1),
+            round(lags[min(len(lags) - 1, int(len(lags) * 0.99))] * 1000, 1),
+        )
+
+
+def peak_rss_kib():
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def directory_size(path):
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def make_config_entry(config_entries, **kwargs):
+    """Create a ConfigEntry with what this Home Assistant version takes."""
+    params = inspect.signature(config_entries.ConfigEntry).parameters
+    defaults = {
+        "version": 1,
+        "minor_version": 1,
+        "source": config_entries.SOURCE_USER,
+        "options": {},
+        "discovery_keys": MappingProxyType({}),
+        "subentries_data": None,
+    }
+    return config_entries.ConfigEntry(
+        **{key: value for key, value in {**defaults, **kwargs}.items() if key in params}
+    )
+
+
+async def block_till_done(hass):
+    """Wait for all work, including the entries' background first refreshes."""
+    if "wait_background_tasks" in inspect.signature(hass.async_block_till_done).parameters:
+        await hass.async_block_till_done(wait_background_tasks=True)
+        return
+    # Older Home Assistant does not wait for background tasks
+    while tasks := [
+        task
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        for task in getattr(entry, "_background_tasks", ())
+    ]:
+        await asyncio.wait(tasks)
+    await hass.async_block_till_done()
+
+
+def reset_singleflight(singleflight):
+    """Forget reusable results, so every refresh that follows runs a session."""
+    singleflight._RESULTS.clear()
+
+
+async def create_hass(config_dir):
+    from homeassistant import bootstrap, config_entries, core, loader
+    from homeassistant.helpers import device_registry, entity_registry
+
+    try:
+        hass = core.HomeAssistant(config_dir)
+    except TypeError:
+        hass = core.HomeAssistant()
+        hass.config.config_dir = config_dir
+    if hasattr(loader, "async_setup"):
+        loader.async_setup(hass)
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    if hasattr(bootstrap, "async_load_base_functionality"):
+        # Registries, translations and the config entries, as at startup
+        await bootstrap.async_load_base_functionality(hass)
+    else:
+        for name in (
+            "area_registry",
+            "floor_registry",
+            "label_registry",
+            "category_registry",
+        ):
+            try:
+                module = __import__(f"homeassistant.helpers.{name}", fromlist=[name])
+            except ImportError:
+                continue
+            await module.async_load(hass)
+        await device_registry.async_load(hass)
+        await entity_registry.async_load(hass)
+        await hass.config_entries.async_initialize()
+    # The fake Bluetooth manager stands in for these
+    hass.config.components.update({"bluetooth", "bluetooth_adapters"})
+    await hass.async_start()
+    return hass
+
+
+async def run(args):
+    from bleak.backends.device import BLEDevice
+    from bleak.exc import BleakError
+    from homeassistant import config_entries
+    from homeassistant.const import EVENT_STATE_CHANGED
+    from homeassistant.core import callback
+    from homeassistant.helpers import storage
+
+    config_dir = tempfile.mkdtemp(prefix="rd200_load_")
+    os.symlink(
+        os.path.join(REPO, "custom_components"),
+        os.path.join(config_dir, "custom_components"),
+    )
+    sys.path.insert(0, config_dir)
+
+    from custom_components.rd200_ble.const import DEFAULT_SCAN_INTERVAL
+    from custom_components.rd200_ble.models import RD200Data
+    from custom_components.rd200_ble.rd200_ble import parser, singleflight
+
+    rng = random.Random(args.seed)
+    devices = {
+        device.address: device
+        for device in (SimulatedRD200(index, rng, args) for index in range(args.entries))
+    }
+    services = FakeServices(*parser.CHARACTERISTIC_UUIDS[parser.PROTOCOL_V2])
+
+    def make_ble_device(device, source, rssi):
+        try:
+            return BLEDevice(device.address, device.name, {"source": source})
+        except TypeError:
+            return BLEDevice(device.address, device.name, {"source": source}, rssi)
+
+    def ble_device_from_address(hass, address, connectable=True):
+        device = devices.get(address)
+        if device is None:
+            return None
+        return make_ble_device(device, SOURCES[0][0], -60)
+
+    def scanner_devices_by_address(hass, address, connectable=True):
+        device = devices.get(address)
+        if device is None:
+            return []
+        # The far proxy hears the device louder, so picking by RSSI alone
+        # would take the worse source.
+        return [
+            SimpleNamespace(
+                scanner=SimpleNamespace(source=source, name=source),
+                ble_device=make_ble_device(device, source, rssi),
+                advertisement=SimpleNamespace(rssi=rssi),
+            )
+            for (source, _, _), rssi in zip(SOURCES, (-75, -60))
+        ]
+
+    latency = {source: factor for source, factor, _ in SOURCES}
+    failure = {source: factor for source, _, factor in SOURCES}
+
+    async def establish_connection(
+        client_class, ble_device, name, disconnected_callback=None, **kwargs
+    ):
+        device = devices[ble_device.address]
+        source = ble_device.details["source"]
+        await asyncio.sleep(args.connect_latency * latency[source])
+        if rng.random() < min(1.0, args.fail * failure[source]):
+            raise BleakError(f"{name}: simulated connection failure")
+        metrics.sessions[source] += 1
+        device.start_session()
+        return FakeClient(device, services, disconnected_callback)
+
+    async def close_stale_connections_by_address(address):
+        pass
+
+    metrics = Metrics()
+    original_write_data = getattr(storage.Store, "_write_data", None)
+
+    def write_data(self, path, data):
+        original_write_data(self, path, data)
+        metrics.store_bytes += os.path.getsize(path)
+
+    patches = [
+        patch(
+            "homeassistant.components.bluetooth.async_ble_device_from_address",
+            ble_device_from_address,
+        ),
+        patch(
+            "homeassistant.components.bluetooth.async_scanner_devices_by_address",
+            scanner_devices_by_address,
+        ),
+        patch.object(parser, "establish_connection", establish_connection),
+        patch(
+            "custom_components.rd200_ble.close_stale_connections_by_address",
+            close_stale_connections_by_address,
+        ),
+    ]
+    if original_write_data is not None:
+        patches.append(patch.object(storage.Store, "_write_data", write_data))
+    for active in patches:
+        active.start()
+
+    hass = await create_hass(config_dir)
+
+    @callback
+    def count_state_write(event):
+        metrics.state_writes += 1
+
+    hass.bus.async_listen(EVENT_STATE_CHANGED, count_state_write)
+    lag_task = asyncio.create_task(metrics.sample_lag())
+    rss_before = peak_rss_kib()
+
+    entries = [
+        make_config_entry(
+            config_entries,
+            domain=DOMAIN,
+            title=device.name,
+            data={},
+            unique_id=device.address,
+        )
+        for device in devices.values()
+    ]
+    started = time.monotonic()
+    await asyncio.gather(*(hass.config_entries.async_add(entry) for entry in entries))
+    await block_till_done(hass)
+    setup_time = time.monotonic() - started
+
+    # A restart sets the entries up from their stored snapshots and does the
+    # first refresh in the background; both are timed, and the refreshes
+    # are done before the poll rounds start.
+    reset_singleflight(singleflight)
+    started = time.monotonic()
+    await asyncio.gather(
+        *(hass.config_entries.async_reload(entry.entry_id) for entry in entries)
+    )
+    await hass.async_block_till_done()
+    restart_time = time.monotonic() - started
+    await block_till_done(hass)
+    restart_refresh_time = time.monotonic() - started
+
+    loaded = [
+        data for data in hass.data.get(DOMAIN, {}).values() if isinstance(data, RD200Data)
+    ]
+    state_writes_before = metrics.state_writes
+    sessions_before = sum(metrics.sessions.values())
+    started = time.monotonic()
+    for _ in range(args.rounds):
+        # The rounds run back to back, well inside the reuse window; the
+        # entries poll without reuse, and nothing is left to reuse anyway.
+        reset_singleflight(singleflight)
+        near_before = metrics.sessions[SOURCES[0][0]]
+        round_sessions_before = sum(metrics.sessions.values())
+        await asyncio.gather(*(data.coordinator.async_refresh() for data in loaded))
+        await block_till_done(hass)
+    poll_time = time.monotonic() - started
+    writes_per_round = (metrics.state_writes - state_writes_before) / args.rounds
+    sessions_per_round = (sum(metrics.sessions.values()) - sessions_before) / args.rounds
+    last_round_sessions = sum(metrics.sessions.values()) - round_sessions_before
+    near_share = (
+        (metrics.sessions[SOURCES[0][0]] - near_before) / last_round_sessions
+        if last_round_sessions
+        else 0.0
+    )
+
+    lag_task.cancel()
+    rss_after = peak_rss_kib()
+    archive_bytes = directory_size(os.path.join(config_dir, ".storage", f"{DOMAIN}_archive"))
+    await hass.async_stop(force=True)
+    for active in patches:
+        active.stop()
+    shutil.rmtree(config_dir, ignore_errors=True)
+
+    lag_max, lag_p99 = metrics.lag_ms()
+    return {
+        "entries": args.entries,
+        "loaded": len(loaded),
+        "setup_s": round(setup_time, 2),
+        "restart_s": round(restart_time, 2),
+        "restart_refresh_s": round(restart_refresh_time, 2),
+        "poll_round_s": round(poll_time / args.rounds, 2),
+        "sessions_per_round": round(sessions_per_round, 1),
+        "best_source_share": round(near_share, 2),
+        "loop_lag_max_ms": lag_max,
+        "loop_lag_p99_ms": lag_p99,
+        "rss_per_entry_kib": round((rss_after - rss_before) / max(args.entries, 1), 1),
+        "state_writes_per_round": round(writes_per_round, 1),
+        "state_writes_per_min": round(writes_per_round * 60 / DEFAULT_SCAN_INTERVAL, 1),
+        "store_bytes": metrics.store_bytes if original_write_data else None,
+        "archive_bytes": archive_bytes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--rounds", type=int, default=3, help="poll rounds per run")
+    parser.add_argument("--fail", type=float, default=0.05, help="connect failure rate")
+    parser.add_argument("--drop", type=float, default=0.01, help="per command disconnect rate")
+    parser.add_argument("--silent", type=float, default=0.0, help="per command no reply rate")
+    parser.add_argument(
+        "--unchanged", type=float, default=0.5, help="sessions where the device had not refreshed"
+    )
+    parser.add_argument(
+        "--connect-latency", type=float, default=0.5, help="near proxy, seconds"
+    )
+    parser.add_argument("--reply-latency", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print JSON lines")
+    args = parser.parse_args()
+
+    if len(args.entries) > 1:
+        # One process per size, so the peak RSS is that size's own
+        results = []
+        for entries in args.entries:
+            command = [sys.executable, os.path.abspath(__file__), "--json"]
+            for name, value in vars(args).items():
+                if name in ("entries", "json"):
+                    continue
+                command += [f"--{name.replace('_', '-')}", str(value)]
+            command += ["--entries", str(entries)]
+            output = subprocess.run(command, check=True, capture_output=True, text=True)
+            results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    else:
+        args.entries = args.entries[0]
+        results = [asyncio.run(run(args))]
+
+    if args.json:
+        for result in results:
+            print(json.dumps(result))
+        return 0
+    for column in results[0]:
+        print(f"{column:>22}  " + "  ".join(f"{str(result[column]):>10}" for result in results))
+    return check_source_selection(results)
+
+
+def check_source_selection(results):
+    """Fail unless the better proxy carried most sessions of the last round.
+
+    Setup and the restart already give every source a try, so by the last
+    round the selection should have settled on the near proxy.
+    """
+    failed = [
+        result["entries"] for result in results if result["best_source_share"] <= 0.5
+    ]
+    if failed:
+        print(
+            f"Source selection did not settle on {SOURCES[0][0]} for"
+            f" {', '.join(map(str, failed))} entries",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""Replay a captured RD200 frame trace through the parser and cache merge.
+
+The trace is the "trace" list from the integration's diagnostics download
+(the whole diagnostics file can be passed as is). Every session found in the
+trace is decoded and merged like the integration does, and the result is
+printed as one JSON line per session.
+
+    python replay_trace.py config_entry-rd200_ble-xxxx.json
+    python replay_trace.py trace.json --imperial --expect expected.jsonl
+
+With --expect the output is compared to a previous run instead, which turns a
+captured field failure into a regression case.
+"""
+import argparse
+import dataclasses
+import json
+import logging
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "custom_components", "rd200_ble")
+)
+
+from rd200_ble import FrameTrace, RD200BluetoothDeviceData, RD200Device, merge_device
+from rd200_ble.const import UPDATE_TIMEOUT
+
+
+def load_frames(path):
+    with open(path, encoding="utf-8") as file:
+        dump = json.load(file)
+    if isinstance(dump, dict):
+        dump = dump.get("data", dump)
+        dump = dump["trace"]
+    return FrameTrace.frames_from_list(dump)
+
+
+def split_sessions(frames):
+    """Group frames into the update sessions they arrived in.
+
+    A session can send 0x50 more than once (a malformed reply is retried), so
+    the session number recorded with each frame decides. Older traces have
+    none; there every 0x50 frame or a gap longer than the update timeout
+    starts a new session.
+    """
+    sessions = []
+    for frame in frames:
+        if frame.session is not None:
+            new_session = not sessions or frame.session != sessions[-1][-1].session
+        else:
+            new_session = (
+                not sessions
+                or frame.opcode == 0x50
+                or frame.timestamp - sessions[-1][-1].timestamp > UPDATE_TIMEOUT
+            )
+        if new_session:
+            sessions.append([])
+        sessions[-1].append(frame)
+    return sessions
+
+
+def replay(frames, is_metric):
+    rd200 = RD200BluetoothDeviceData(logging.getLogger("replay"), is_metric=is_metric)
+    cached = None
+    results = []
+    for session in split_sessions(frames):
+        device = RD200Device()
+        for frame in session:
+            device = rd200.decode_frame(frame.protocol, frame.opcode, frame.data, device)
+        merged = merge_device(cached, device, f"{session[-1].timestamp:.3f}")
+        if merged is not None:
+            cached = merged
+        results.append(
+            {
+                "start": session[0].timestamp,
+                "opcodes": [f"{frame.opcode:#04x}" for frame in session],
+                "reading": device.sensors,
+                "merged": dataclasses.asdict(cached)["sensors"] if cached else None,
+            }
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("trace", help="diagnostics file or trace list (JSON)")
+    parser.add_argument("--imperial", action="store_true", help="decode to pCi/L")
+    parser.add_argument("--expect", help="JSON lines from an earlier run to compare")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    results = replay(load_frames(args.trace), not args.imperial)
+    lines = [json.dumps(result, sort_keys=True) for result in results]
+
+    if args.expect is None:
+        print("\n".join(lines))
+        return 0
+
+    with open(args.expect, encoding="utf-8") as file:
+        expected = [line.strip() for line in file if line.strip()]
+    if lines == expected:
+        print(f"{len(lines)} sessions match")
+        return 0
+    for number, (line, wanted) in enumerate(zip(lines, expected)):
+        if line != wanted:
+            print(f"session {number} differs:\n  got      {line}\n  expected {wanted}")
+    if len(lines) != len(expected):
+        print(f"got {len(lines)} sessions, expected {len(expected)}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())